@@ -1,41 +1,77 @@
 import os
-import json
+import asyncio
 import time
+import functools
+import hashlib
+import multiprocessing
 import uuid
 import shutil
-import subprocess
 import threading
-import hashlib
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 
+import aiofiles
+import anyio
+import orjson
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, ORJSONResponse, RedirectResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from jinja2 import Environment, FileSystemLoader
-from fastapi.responses import RedirectResponse
-import sys
+
+# Pipeline stages are imported once at boot instead of spawning a fresh
+# interpreter (and re-importing fitz / google-genai) for every job.
+from scripts import stages, label_from_vision, generate_fill_json
 
 DATA_DIR = Path(os.getenv("DATA_DIR", "/tmp/agent_assist")).resolve()
-SCRIPTS_DIR = Path(os.getenv("SCRIPTS_DIR", "scripts")).resolve()
 
-PROFILES_DIR = DATA_DIR / "profiles"
+# Token-based profiles (MVP). Create a file: /var/data/profiles/almir.json
+PROFILES_DIR = Path(os.getenv("PROFILES_DIR", str(DATA_DIR / "profiles")))
+FALLBACK_PROFILES_DIR = Path("profiles")
 LIBRARY_DIR = DATA_DIR / "library_pdfs"
 MAPPINGS_DIR = DATA_DIR / "mappings"
 JOBS_DIR = DATA_DIR / "jobs"
 DONE_DIR = DATA_DIR / "completed"
 
+# Widget labels cached by extract_form_fields; every job runs in a fresh job dir, so they
+# have to live somewhere shared to ever hit.
+os.environ.setdefault("PDFCRUSH_CACHE_DIR", str(DATA_DIR / "label_cache"))
+# Same for the Gemini answer cache, which holds user instructions and profile details:
+# keep it under DATA_DIR rather than the server's working directory.
+os.environ.setdefault("LLM_CACHE_DIR", str(DATA_DIR / "llm_cache"))
+
 for d in [PROFILES_DIR, LIBRARY_DIR, MAPPINGS_DIR, JOBS_DIR, DONE_DIR]:
     d.mkdir(parents=True, exist_ok=True)
 
-# --- SCRIPT PATHS (UPDATED FOR NEW WORKFLOW) ---
-# Ensure these filenames match exactly what you saved earlier
-EXTRACT = SCRIPTS_DIR / "extract_form_fields.py"
-LABEL = SCRIPTS_DIR / "label_from_vision.py"
-GENFILL = SCRIPTS_DIR / "generate_fill_json.py"
-NATIVE = SCRIPTS_DIR / "native_fill.py"  # Replaces overlay_fill.py
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# --- PIPELINE STAGES ---
+# CPU-bound PDF stages run in long-lived worker processes (sidesteps the GIL);
+# the network-bound Gemini stages share a thread pool in this process.
+# Workers come from a forkserver: forking this multithreaded server directly could copy
+# a lock some other thread holds. Stages that start their own process pools share the
+# cores between the CPU pool's workers instead of each taking cpu_count of them.
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", os.cpu_count() or 1))
+CPU_POOL = ProcessPoolExecutor(
+    max_workers=CPU_WORKERS,
+    mp_context=multiprocessing.get_context("forkserver"),
+    initializer=stages.worker_init,
+    initargs=(max(1, (os.cpu_count() or 1) // CPU_WORKERS),),
+)
+IO_POOL = ThreadPoolExecutor(max_workers=int(os.getenv("IO_WORKERS", "4")))
+
+# Jobs beyond this many wait in the executor's queue instead of each getting a thread.
+JOB_POOL = ThreadPoolExecutor(max_workers=int(os.getenv("JOB_CONCURRENCY", "4")))
+
+
+def submit_stage(name: str, argv: list[str]) -> str:
+    pool = CPU_POOL if name in stages.CPU_STAGES else IO_POOL
+    return pool.submit(stages.run_stage, name, argv).result()
+
 
 # --- app ---
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 
@@ -44,35 +80,166 @@ def root():
     return RedirectResponse("/t/almir")
 
 
-jinja = Environment(loader=FileSystemLoader("templates"))
+jinja = Environment(loader=FileSystemLoader("templates"), auto_reload=False, cache_size=-1)
+INDEX_TPL = jinja.get_template("index.html")
+MAPPER_TPL = jinja.get_template("mapper.html")
 
-# Token-based profiles (MVP). Create a file: /var/data/profiles/almir.json
-PROFILES_DIR = Path(os.getenv("PROFILES_DIR", str(DATA_DIR / "profiles")))
-FALLBACK_PROFILES_DIR = Path("profiles")
+@functools.lru_cache(maxsize=128)
+def _load_profile_cached(path_str: str, mtime_ns: int, size: int) -> dict:
+    # mtime/size are only part of the cache key: an edited profile misses the cache.
+    with open(path_str, "rb") as f:
+        return orjson.loads(f.read())
 
 
-def load_profile(token: str) -> dict:
+# Recently-missed tokens: repeated requests for the same unknown token cost a dict lookup
+# instead of two stats. Each new random token still pays both stats plus a locked insert,
+# so this does not make token scans cheap; that needs a per-client rate limit.
+_NEG_CACHE: OrderedDict[str, float] = OrderedDict()
+NEG_CACHE_TTL = 5.0
+NEG_CACHE_MAX = 1024
+_NEG_CACHE_LOCK = threading.Lock()
+
+
+def _profile_key(token: str) -> tuple[str, int, int]:
+    missed_at = _NEG_CACHE.get(token)
+    if missed_at is not None and time.monotonic() - missed_at < NEG_CACHE_TTL:
+        raise HTTPException(404, "Unknown token/profile")
+
     p = PROFILES_DIR / f"{token}.json"
-    if not p.exists():
+    try:
+        st = os.stat(p)
+    except FileNotFoundError:
         p = FALLBACK_PROFILES_DIR / f"{token}.json"
-    if not p.exists():
-        raise HTTPException(404, "Unknown token/profile")
-    return json.loads(p.read_text(encoding="utf-8"))
+        try:
+            st = os.stat(p)
+        except FileNotFoundError:
+            with _NEG_CACHE_LOCK:
+                _NEG_CACHE[token] = time.monotonic()
+                _NEG_CACHE.move_to_end(token)
+                if len(_NEG_CACHE) > NEG_CACHE_MAX:
+                    _NEG_CACHE.popitem(last=False)
+            raise HTTPException(404, "Unknown token/profile")
+    if token in _NEG_CACHE:
+        with _NEG_CACHE_LOCK:
+            _NEG_CACHE.pop(token, None)
+    return str(p), st.st_mtime_ns, st.st_size
+
+
+def load_profile(token: str) -> dict:
+    return dict(_load_profile_cached(*_profile_key(token)))
+
+
+_PROFILE_PREFIX_TMPL = (
+    "Agent profile defaults: agent_name=%s, brokerage=%s, default_fee=%s, "
+    "default_retainer=%s, default_dual_agency=%s. "
+)
+_MERGED_TMPL = "%sUser instruction: %s"
+
+
+@functools.lru_cache(maxsize=128)
+def _profile_prefix(path_str: str, mtime_ns: int, size: int) -> str:
+    """Instruction prefix built from the profile defaults; only the user instruction varies per job."""
+    profile = _load_profile_cached(path_str, mtime_ns, size)
+    return _PROFILE_PREFIX_TMPL % (
+        profile.get("agent_name"),
+        profile.get("brokerage"),
+        profile.get("default_fee", ""),
+        profile.get("default_retainer", ""),
+        profile.get("default_dual_agency", ""),
+    )
+
+
+# Live job status is kept in memory; status.json is only a crash-recovery copy.
+STATUS: dict[str, dict] = {}
+STATUS_LOCK = threading.Lock()
+_STATUS_FLUSHED_AT: dict[str, float] = {}
+STATUS_FLUSH_STATES = {"done", "error", "needs_mapping"}
+STATUS_FLUSH_INTERVAL = 5.0
+# SSE listeners per job: (event loop, queue) pairs fed from the pipeline threads.
+_SUBSCRIBERS: dict[str, list[tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+SSE_KEEPALIVE = 15.0
 
 
 def write_status(job_dir: Path, obj: dict):
-    (job_dir / "status.json").write_text(json.dumps(obj, indent=2), encoding="utf-8")
+    (job_dir / "status.json").write_bytes(orjson.dumps(obj))
+
+
+@functools.lru_cache(maxsize=512)
+def _read_json_cached(path_str: str, mtime_ns: int, size: int) -> dict:
+    with open(path_str, "rb") as f:
+        return orjson.loads(f.read())
 
 
 def read_status(job_dir: Path) -> dict:
+    with STATUS_LOCK:
+        live = STATUS.get(job_dir.name)
+    if live is not None:
+        return dict(live)
     p = job_dir / "status.json"
-    if not p.exists():
+    try:
+        st = os.stat(p)
+    except FileNotFoundError:
         return {"state": "unknown", "progress": 0, "message": "No status."}
-    return json.loads(p.read_text(encoding="utf-8"))
+    return dict(_read_json_cached(str(p), st.st_mtime_ns, st.st_size))
+
+
+def _link_or_copy(src: Path, dst: Path):
+    """Hardlink src to dst (no bytes copied), copying when linking is not possible."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def _move_file(src: Path, dst: Path):
+    """Rename src to dst, copying when they sit on different filesystems."""
+    try:
+        os.replace(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
 
+def _library_display_name(p: Path) -> str:
+    """Original upload name from the library PDF's .json sidecar, else the file name."""
+    name = p.name
+    try:
+        meta = orjson.loads(p.with_suffix(".json").read_bytes())
+        name = meta.get("name", name)
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        pass
+    return name
 
-def sha1_bytes(b: bytes) -> str:
-    return hashlib.sha1(b).hexdigest()
+
+async def _stat_or_404(p: Path, detail: str = "Not found") -> os.stat_result:
+    """Stat off the event loop; the result is handed to FileResponse so it skips its own stat."""
+    try:
+        return await anyio.to_thread.run_sync(os.stat, p)
+    except FileNotFoundError:
+        raise HTTPException(404, detail)
+
+
+class _HashingReader:
+    """File wrapper that feeds every chunk read through it into a hasher."""
+
+    def __init__(self, f, h):
+        self._f = f
+        self._h = h
+
+    def read(self, n=-1):
+        chunk = self._f.read(n)
+        self._h.update(chunk)
+        return chunk
+
+
+def _persist_upload(src, dst: Path) -> str:
+    """
+    Copy an upload's spooled temp file to dst file-to-file; returns its SHA-1. Library,
+    mapping and completed-doc IDs are derived from it, so it must not change.
+    """
+    h = hashlib.sha1()
+    with open(dst, "wb") as out:
+        shutil.copyfileobj(_HashingReader(src, h), out, UPLOAD_CHUNK_SIZE)
+    return h.hexdigest()
 
 
 def mapping_exists(pdf_id: str) -> bool:
@@ -83,7 +250,29 @@ def set_status(job_dir: Path, state: str, progress: int, message: str, extra: di
     obj = {"state": state, "progress": progress, "message": message, "updated_at": time.time()}
     if extra:
         obj.update(extra)
+
+    job_id = job_dir.name
+    now = time.monotonic()
+    with STATUS_LOCK:
+        STATUS[job_id] = obj
+        for loop, q in _SUBSCRIBERS.get(job_id, ()):
+            loop.call_soon_threadsafe(q.put_nowait, obj)
+        flush = (
+            state in STATUS_FLUSH_STATES
+            or now - _STATUS_FLUSHED_AT.get(job_id, float("-inf")) >= STATUS_FLUSH_INTERVAL
+        )
+        if flush:
+            _STATUS_FLUSHED_AT[job_id] = now
+    if not flush:
+        return
+
     write_status(job_dir, obj)
+    if state in ("done", "error"):
+        # Finished jobs are served from disk from now on.
+        with STATUS_LOCK:
+            if STATUS.get(job_id) is obj:
+                del STATUS[job_id]
+                _STATUS_FLUSHED_AT.pop(job_id, None)
 
 
 @app.get("/healthz")
@@ -94,8 +283,7 @@ def healthz():
 @app.get("/t/{token}", response_class=HTMLResponse)
 def ui(token: str):
     profile = load_profile(token)
-    tpl = jinja.get_template("index.html")
-    return tpl.render(token=token, profile_name=profile.get("agent_name", "(profile)"))
+    return INDEX_TPL.render(token=token, profile_name=profile.get("agent_name", "(profile)"))
 
 
 @app.get("/t/{token}/map/{pdf_id}", response_class=HTMLResponse)
@@ -103,8 +291,7 @@ def map_editor_ui(token: str, pdf_id: str):
     load_profile(token)
     if not (MAPPINGS_DIR / pdf_id).exists():
         raise HTTPException(404, "Mapping not found")
-    tpl = jinja.get_template("mapper.html")
-    return tpl.render(token=token, pdf_id=pdf_id)
+    return MAPPER_TPL.render(token=token, pdf_id=pdf_id)
 
 
 @app.get("/api/profile/{token}")
@@ -115,35 +302,34 @@ def api_profile(token: str):
 @app.get("/api/library/{token}")
 def api_library(token: str):
     load_profile(token)
+    # One directory pass: pair each PDF with its .json sidecar without extra stats.
+    with os.scandir(LIBRARY_DIR) as it:
+        entries = list(it)
+    pdfs = {e.name[:-4]: e for e in entries if e.name.endswith(".pdf") and e.is_file()}
+    metas = {e.name[:-5]: e for e in entries if e.name.endswith(".json")}
+
     out = []
-    for p in sorted(LIBRARY_DIR.glob("*.pdf")):
-        meta_path = p.with_suffix(".json")
-        name = p.name
-        if meta_path.exists():
+    for stem, e in sorted(pdfs.items()):
+        name = e.name
+        meta_entry = metas.get(stem)
+        if meta_entry is not None:
             try:
-                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+                with open(meta_entry.path, "rb") as f:
+                    meta = orjson.loads(f.read())
                 name = meta.get("name", name)
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 pass
-        out.append({"id": p.stem, "name": name})
+        out.append({"id": stem, "name": name})
     return out
 
 
 @app.get("/api/library/{token}/pdf/{pdf_id}")
-def api_library_pdf(token: str, pdf_id: str):
-    load_profile(token)
+async def api_library_pdf(token: str, pdf_id: str):
+    await anyio.to_thread.run_sync(load_profile, token)
     p = LIBRARY_DIR / f"{pdf_id}.pdf"
-    if not p.exists():
-        raise HTTPException(404, "PDF not found")
-    meta_path = p.with_suffix(".json")
-    filename = p.name
-    if meta_path.exists():
-        try:
-            meta = json.loads(meta_path.read_text(encoding="utf-8"))
-            filename = meta.get("name", filename)
-        except json.JSONDecodeError:
-            pass
-    return FileResponse(str(p), media_type="application/pdf", filename=filename)
+    st = await _stat_or_404(p, "PDF not found")
+    filename = await anyio.to_thread.run_sync(_library_display_name, p)
+    return FileResponse(str(p), media_type="application/pdf", filename=filename, stat_result=st)
 
 
 @app.delete("/api/library/{token}/{pdf_id}")
@@ -165,11 +351,15 @@ def api_library_delete(token: str, pdf_id: str):
 def api_completed_list(token: str):
     load_profile(token)
     out = []
-    for d in sorted(DONE_DIR.glob("*")):
-        meta = d / "meta.json"
-        if meta.exists():
-            m = json.loads(meta.read_text(encoding="utf-8"))
-            out.append(m)
+    with os.scandir(DONE_DIR) as it:
+        dirs = [e.path for e in it if e.is_dir()]
+    for d in dirs:
+        meta_path = os.path.join(d, "meta.json")
+        try:
+            st = os.stat(meta_path)
+        except FileNotFoundError:
+            continue
+        out.append(_read_json_cached(meta_path, st.st_mtime_ns, st.st_size))
     out.sort(key=lambda x: x.get("created_at", 0), reverse=True)
     return out
 
@@ -183,14 +373,13 @@ def api_completed_delete(token: str, doc_id: str):
     return {"ok": True}
 
 
-@app.post("/api/jobs/{token}")
-async def create_job(
-    token: str,
-    instruction: str = Form(...),
-    pdf: UploadFile | None = File(None),
-    pdf_id: str | None = Form(None),
-):
-    profile = load_profile(token)
+def _prepare_job(token: str, instruction: str, pdf: UploadFile | None, pdf_id: str | None):
+    """
+    Blocking half of create_job: profile lookup, putting the input PDF in place and the
+    first status flush. Runs on a worker thread so none of it stalls the event loop.
+    """
+    profile_key = _profile_key(token)
+    profile = dict(_load_profile_cached(*profile_key))
 
     if (pdf is None) == (pdf_id is None):
         raise HTTPException(400, "Provide exactly one of: pdf upload OR pdf_id")
@@ -204,41 +393,39 @@ async def create_job(
     resolved_pdf_id = None
 
     if pdf is not None:
-        b = await pdf.read()
-        input_pdf_path.write_bytes(b)
+        # UploadFile is already backed by a SpooledTemporaryFile: copy it straight to
+        # disk (hashing as we go) instead of materialising the PDF as bytes.
+        digest = _persist_upload(pdf.file, input_pdf_path)
         input_name = pdf.filename or "uploaded.pdf"
-        resolved_pdf_id = sha1_bytes(b)[:16]
+        resolved_pdf_id = digest[:16]
         library_pdf_path = LIBRARY_DIR / f"{resolved_pdf_id}.pdf"
-        library_pdf_path.write_bytes(b)
-        (library_pdf_path.with_suffix(".json")).write_text(
-            json.dumps({"name": input_name}, indent=2),
-            encoding="utf-8",
-        )
+        if not library_pdf_path.exists():
+            _link_or_copy(input_pdf_path, library_pdf_path)
+        (library_pdf_path.with_suffix(".json")).write_bytes(orjson.dumps({"name": input_name}))
     else:
         p = LIBRARY_DIR / f"{pdf_id}.pdf"
         if not p.exists():
             raise HTTPException(404, "Unknown pdf_id")
-        shutil.copyfile(p, input_pdf_path)
-        input_name = p.name
-        meta_path = p.with_suffix(".json")
-        if meta_path.exists():
-            try:
-                meta = json.loads(meta_path.read_text(encoding="utf-8"))
-                input_name = meta.get("name", input_name)
-            except json.JSONDecodeError:
-                pass
+        _link_or_copy(p, input_pdf_path)
+        input_name = _library_display_name(p)
         resolved_pdf_id = pdf_id
 
-    merged = (
-        f"Agent profile defaults: agent_name={profile.get('agent_name')}, "
-        f"brokerage={profile.get('brokerage')}, "
-        f"default_fee={profile.get('default_fee','')}, "
-        f"default_retainer={profile.get('default_retainer','')}, "
-        f"default_dual_agency={profile.get('default_dual_agency','')}. "
-        f"User instruction: {instruction}"
-    )
+    merged = _MERGED_TMPL % (_profile_prefix(*profile_key), instruction)
 
     set_status(job_dir, "queued", 0, "Queued")
+    return job_id, job_dir, input_pdf_path, input_name, resolved_pdf_id, profile, merged
+
+
+@app.post("/api/jobs/{token}")
+async def create_job(
+    token: str,
+    instruction: str = Form(...),
+    pdf: UploadFile | None = File(None),
+    pdf_id: str | None = Form(None),
+):
+    job_id, job_dir, input_pdf_path, input_name, resolved_pdf_id, profile, merged = (
+        await anyio.to_thread.run_sync(_prepare_job, token, instruction, pdf, pdf_id)
+    )
 
     def run_pipeline():
         try:
@@ -263,22 +450,15 @@ async def create_job(
                 set_status(job_dir, "running", 18, "Extracting fields & creating visual reference…")
 
                 # Calls extract_form_fields.py
-                r1 = subprocess.run(
-                    [sys.executable, str(EXTRACT), str(input_pdf_path)],
-                    capture_output=True,
-                    text=True,
-                    cwd=str(job_dir),
-                )
-                if r1.returncode != 0:
-                    raise RuntimeError(f"extract_form_gem4 failed:\n{r1.stderr}\n{r1.stdout}")
+                submit_stage("extract_form_gem4", [str(input_pdf_path)])
 
                 try:
                     # Move the generated files to the centralized mapping folder
                     # Note: We rename _final.pdf to annotated.pdf for consistency with the UI
                     if script_map_csv.exists():
-                        shutil.copyfile(script_map_csv, map_csv)
+                        _move_file(script_map_csv, map_csv)
                     if script_final_pdf.exists():
-                        shutil.copyfile(script_final_pdf, annotated)
+                        _move_file(script_final_pdf, annotated)
                 except Exception as e:
                     raise RuntimeError(f"Failed to move mapping outputs: {e}")
 
@@ -286,13 +466,7 @@ async def create_job(
 
                 # Calls label_from_vision.py
                 # Note: Pass the *annotated* (red number) PDF
-                r2 = subprocess.run(
-                    [sys.executable, str(LABEL), str(annotated), str(map_csv)],
-                    capture_output=True,
-                    text=True,
-                )
-                if r2.returncode != 0:
-                    raise RuntimeError(f"label_from_vision failed:\n{r2.stderr}\n{r2.stdout}")
+                submit_stage("label_from_vision", [str(annotated), str(map_csv)])
 
                 # Wait for user confirmation (local mapping GUI would happen here in a desktop app)
                 # For web app, we skip GUI but allow viewing the annotated PDF
@@ -315,10 +489,9 @@ async def create_job(
 
             # Calls generate_fill_json.py
             # IMPORTANT: Pass 'annotated' PDF for visual context + 'rich_csv' for labels
-            r3 = subprocess.run(
+            submit_stage(
+                "generate_fill_json",
                 [
-                    sys.executable,
-                    str(GENFILL),
                     "--csv",
                     str(rich_csv),
                     "--pdf",
@@ -328,11 +501,7 @@ async def create_job(
                     "--out",
                     str(fill_json),
                 ],
-                capture_output=True,
-                text=True,
             )
-            if r3.returncode != 0:
-                raise RuntimeError(f"generate_fill_json failed:\n{r3.stderr}\n{r3.stdout}")
 
             set_status(job_dir, "running", 78, "Native filling (AcroForms)…")
             filled_active = job_dir / "filled_editable.pdf"
@@ -341,10 +510,9 @@ async def create_job(
             # Calls native_fill.py
             # IMPORTANT: Pass 'input_pdf_path' (Original Clean PDF) for final output
             # + 'rich_csv' for coordinates + 'fill_json' for values
-            r4 = subprocess.run(
+            submit_stage(
+                "native_fill",
                 [
-                    sys.executable,
-                    str(NATIVE),
                     "--pdf",
                     str(input_pdf_path),
                     "--csv",
@@ -356,19 +524,15 @@ async def create_job(
                     "--out-flat",
                     str(filled_flat),
                 ],
-                capture_output=True,
-                text=True,
             )
-            if r4.returncode != 0:
-                raise RuntimeError(f"native_fill failed:\n{r4.stderr}\n{r4.stdout}")
 
             # 3) Save to completed
             done_id = job_id
             done_dir = DONE_DIR / done_id
             done_dir.mkdir(parents=True, exist_ok=True)
-            shutil.copyfile(filled_active, done_dir / "filled_editable.pdf")
-            shutil.copyfile(filled_flat, done_dir / "filled_flattened.pdf")
-            shutil.copyfile(fill_json, done_dir / "fill_plan.json")
+            _move_file(filled_active, done_dir / "filled_editable.pdf")
+            _move_file(filled_flat, done_dir / "filled_flattened.pdf")
+            _move_file(fill_json, done_dir / "fill_plan.json")
 
             meta = {
                 "id": done_id,
@@ -378,7 +542,7 @@ async def create_job(
                 "pdf_flat_url": f"/api/completed/{token}/{done_id}/pdf_flat",
                 "json_url": f"/api/completed/{token}/{done_id}/json",
             }
-            (done_dir / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+            (done_dir / "meta.json").write_bytes(orjson.dumps(meta))
 
             set_status(
                 job_dir,
@@ -394,12 +558,10 @@ async def create_job(
 
         except Exception as e:
             # Print full stack trace to logs for debugging
-            import traceback
-
             traceback.print_exc()
             set_status(job_dir, "error", 100, str(e))
 
-    threading.Thread(target=run_pipeline, daemon=True).start()
+    JOB_POOL.submit(run_pipeline)
     return {"job_id": job_id}
 
 
@@ -407,84 +569,124 @@ async def create_job(
 def job_status(token: str, job_id: str):
     load_profile(token)
     job_dir = JOBS_DIR / job_id
-    if not job_dir.exists():
+    if job_id not in STATUS and not job_dir.exists():
         raise HTTPException(404, "Unknown job")
     return read_status(job_dir)
 
 
+@app.get("/api/jobs/{token}/{job_id}/stream")
+async def job_stream(token: str, job_id: str):
+    """Server-Sent Events feed of status updates, so the UI need not poll /status."""
+    await anyio.to_thread.run_sync(load_profile, token)
+    job_dir = JOBS_DIR / job_id
+    if job_id not in STATUS and not job_dir.exists():
+        raise HTTPException(404, "Unknown job")
+
+    q: asyncio.Queue = asyncio.Queue()
+    sub = (asyncio.get_running_loop(), q)
+    with STATUS_LOCK:
+        _SUBSCRIBERS.setdefault(job_id, []).append(sub)
+
+    async def events():
+        try:
+            status = read_status(job_dir)
+            while True:
+                yield b"data: " + orjson.dumps(status) + b"\n\n"
+                if status.get("state") in ("done", "error"):
+                    break
+                while True:
+                    try:
+                        status = await asyncio.wait_for(q.get(), SSE_KEEPALIVE)
+                        break
+                    except asyncio.TimeoutError:
+                        yield b": keepalive\n\n"
+        finally:
+            with STATUS_LOCK:
+                subs = _SUBSCRIBERS.get(job_id, [])
+                if sub in subs:
+                    subs.remove(sub)
+                if not subs:
+                    _SUBSCRIBERS.pop(job_id, None)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/api/completed/{token}/{doc_id}/pdf_editable")
-def completed_pdf_editable(token: str, doc_id: str):
-    load_profile(token)
+async def completed_pdf_editable(token: str, doc_id: str):
+    await anyio.to_thread.run_sync(load_profile, token)
     p = DONE_DIR / doc_id / "filled_editable.pdf"
-    if not p.exists():
-        raise HTTPException(404, "Not found")
+    st = await _stat_or_404(p)
     return FileResponse(
         str(p),
         media_type="application/pdf",
         filename="filled_editable.pdf",
+        stat_result=st,
     )
 
 
 @app.get("/api/completed/{token}/{doc_id}/pdf_flat")
-def completed_pdf_flat(token: str, doc_id: str):
-    load_profile(token)
+async def completed_pdf_flat(token: str, doc_id: str):
+    await anyio.to_thread.run_sync(load_profile, token)
     p = DONE_DIR / doc_id / "filled_flattened.pdf"
-    if not p.exists():
-        raise HTTPException(404, "Not found")
+    st = await _stat_or_404(p)
     return FileResponse(
         str(p),
         media_type="application/pdf",
         filename="filled_flattened.pdf",
+        stat_result=st,
     )
 
 
 @app.get("/api/completed/{token}/{doc_id}/pdf")
-def completed_pdf_legacy(token: str, doc_id: str):
-    load_profile(token)
-    preferred = DONE_DIR / doc_id / "filled_flattened.pdf"
-    fallback = DONE_DIR / doc_id / "filled.pdf"
-    p = preferred if preferred.exists() else fallback
-    if not p.exists():
-        raise HTTPException(404, "Not found")
-    return FileResponse(str(p), media_type="application/pdf", filename=p.name)
+async def completed_pdf_legacy(token: str, doc_id: str):
+    await anyio.to_thread.run_sync(load_profile, token)
+    p = DONE_DIR / doc_id / "filled_flattened.pdf"
+    try:
+        st = await anyio.to_thread.run_sync(os.stat, p)
+    except FileNotFoundError:
+        p = DONE_DIR / doc_id / "filled.pdf"
+        st = await _stat_or_404(p)
+    return FileResponse(str(p), media_type="application/pdf", filename=p.name, stat_result=st)
 
 
 @app.get("/api/completed/{token}/{doc_id}/json")
-def completed_json(token: str, doc_id: str):
-    load_profile(token)
+async def completed_json(token: str, doc_id: str):
+    await anyio.to_thread.run_sync(load_profile, token)
     p = DONE_DIR / doc_id / "fill_plan.json"
-    if not p.exists():
-        raise HTTPException(404, "Not found")
-    return FileResponse(str(p), media_type="application/json", filename="fill_plan.json")
+    st = await _stat_or_404(p)
+    return FileResponse(str(p), media_type="application/json", filename="fill_plan.json", stat_result=st)
 
 
 @app.get("/api/mappings/{token}/{pdf_id}/annotated")
-def mapping_annotated(token: str, pdf_id: str):
-    load_profile(token)
+async def mapping_annotated(token: str, pdf_id: str):
+    await anyio.to_thread.run_sync(load_profile, token)
     p = MAPPINGS_DIR / pdf_id / "annotated.pdf"
-    if not p.exists():
-        raise HTTPException(404, "Not found")
-    return FileResponse(str(p), media_type="application/pdf", filename="annotated.pdf")
+    st = await _stat_or_404(p)
+    return FileResponse(str(p), media_type="application/pdf", filename="annotated.pdf", stat_result=st)
 
 
 @app.get("/api/mappings/{token}/{pdf_id}/rich")
-def mapping_rich(token: str, pdf_id: str):
-    load_profile(token)
+async def mapping_rich(token: str, pdf_id: str):
+    await anyio.to_thread.run_sync(load_profile, token)
     p = MAPPINGS_DIR / pdf_id / "map_rich.csv"
-    if not p.exists():
-        raise HTTPException(404, "Not found")
-    return FileResponse(str(p), media_type="text/csv", filename="map_rich.csv")
+    st = await _stat_or_404(p)
+    return FileResponse(str(p), media_type="text/csv", filename="map_rich.csv", stat_result=st)
 
 
 @app.post("/api/mappings/{token}/{pdf_id}/save")
 async def save_mapping(token: str, pdf_id: str, request: Request):
-    load_profile(token)
+    await anyio.to_thread.run_sync(load_profile, token)
     body = await request.body()
-    csv_text = body.decode("utf-8")
 
     map_dir = MAPPINGS_DIR / pdf_id
-    if not map_dir.exists():
+    if not await anyio.to_thread.run_sync(map_dir.exists):
         raise HTTPException(404, "Mapping not found")
 
-    (map_dir / "map_rich.csv").write_text(csv_text, encoding="utf-8")
+    # The editor posts UTF-8 CSV; store the bytes as-is without a decode/encode round-trip.
+    async with aiofiles.open(map_dir / "map_rich.csv", "wb") as f:
+        await f.write(body)
     return {"ok": True}
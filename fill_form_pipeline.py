@@ -14,40 +14,52 @@ python fill_form_pipeline.py \\
     --pdf path/to/form.pdf \\
     --csv path/to/form_map_rich.csv \\
     --request "Fill for Sip With Zoe ..." \\
+    [--request "Fill for another permittee ..."] \\
     --json-out mapped.json \\
     --pdf-out filled.pdf
 
 You must export OPENAI_API_KEY in your environment; optionally set OPENAI_BASE
 if you are targeting a compatible endpoint.
+
+Several ``--request`` values (or one JSON list of strings) are answered in a
+single batched call; outputs then get an ``_<n>`` suffix per request.
+With ``--batch`` each request is instead queued on the OpenAI Batch API
+(half price, no per-minute rate limits, results within 24h) and the script
+waits for the batch to finish. ``--concurrency N`` sends each request as its
+own call instead, with up to N in flight at once.
 """
 
 import argparse
+import asyncio
+import csv
+import functools
+import hashlib
+import io
 import json
 import os
+import re
+import time
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-from openai import OpenAI
+import orjson
+from openai import AsyncOpenAI, OpenAI
 
 from overlay_fill import overlay_pdf
 
 PROMPT_TEMPLATE = """You are given:
-1) A CSV that maps form fields to on-page coordinates: row, heading, subheading, form_entry_description, x1, y1, x2, y2, page, rich_description.
+1) A CSV listing the form's fields: row, heading, subheading, form_entry_description, rich_description, page.
 2) Light instructions about the form (e.g., tax rate is a multiplier, container size typically 750 ml, etc.).
 3) A user’s free-form request describing permittee, supplier, dates, quantities, taxes, and product details.
 
-Your task: Produce a JSON array where each object matches one CSV row that you can confidently fill. Include:
+Your task: Produce a "fields" list where each object matches one CSV row that you can confidently fill. Include:
 - row (integer from CSV)
-- heading
-- rich_description
-- page
-- x1, y1, x2, y2 (from CSV)
-- value (string or number; omit if unknown)
-- note (optional, clarifications/assumptions)
+- value (string or number)
+- note (clarifications/assumptions, or null)
 
 Rules:
 - Only include rows you can fill confidently from the request; skip rows you cannot fill.
-- Do not change coordinates or page numbers; copy them from the CSV row you’re populating.
+- Use the row numbers exactly as they appear in the CSV.
 - Keep numeric fields numeric (e.g., tax rate 1.5 should be 1.5, not “1.5%”).
 - Tax rate is a multiplier per gallon, NOT a percent.
 - Container size: default to “750 ml” when implied but not stated.
@@ -58,63 +70,288 @@ Rules:
 - Preserve capitalization from the request for names/addresses unless clearly a formatting typo.
 - If date is provided, place it in date fields; reuse for signature date if appropriate.
 
-Output strictly as JSON (no prose). Example schema for each filled row:
-{
-  "row": <int>,
-  "heading": "<string>",
-  "rich_description": "<string>",
-  "page": <int>,
-  "x1": <float>,
-  "y1": <float>,
-  "x2": <float>,
-  "y2": <float>,
-  "value": <string or number>,
-  "note": "<string>"
-}
-
 CSV mapping:
 ```csv
 {csv_text}
 ```
 
-User request:
+"""
+
+SINGLE_REQUEST_TEMPLATE = """User request:
 {user_request}
 """
 
+BATCH_REQUEST_TEMPLATE = """There are {count} independent user requests below, tagged [1]..[{count}].
+Fill the form separately for each one. Return exactly one "requests" entry per request,
+with its request_index and the fields filled for it.
+
+{request_blocks}
+"""
+
+_FIELD_PROPS = {
+    "row": {"type": "integer"},
+    "value": {"type": ["string", "number"]},
+    "note": {"type": ["string", "null"]},
+}
+
+
+def _strict_object(props: Dict[str, Any]) -> Dict[str, Any]:
+    return {"type": "object", "properties": props, "required": list(props), "additionalProperties": False}
+
+
+FIELDS_SCHEMA = _strict_object({"fields": {"type": "array", "items": _strict_object(_FIELD_PROPS)}})
+BATCH_SCHEMA = _strict_object({
+    "requests": {
+        "type": "array",
+        "items": _strict_object({"request_index": {"type": "integer"}, **FIELDS_SCHEMA["properties"]}),
+    }
+})
+
+
+def response_format(request_count: int) -> Dict[str, Any]:
+    """Structured-output schema so the reply always parses; strict mode needs an object at the top."""
+    if request_count == 1:
+        name, schema = "filled_rows", FIELDS_SCHEMA
+    else:
+        name, schema = "filled_requests", BATCH_SCHEMA
+    return {"type": "json_schema", "json_schema": {"name": name, "schema": schema, "strict": True}}
+
+
+# Columns the model needs to decide values; geometry is joined back in afterwards.
+PROMPT_COLUMNS = ("row", "heading", "subheading", "form_entry_description", "rich_description", "page")
+# Copied from the CSV onto each filled row, so overlay_pdf gets the full record.
+ROW_COLUMNS = ("heading", "rich_description", "page", "x1", "y1", "x2", "y2")
+NUMERIC_COLUMNS = {"page": int, "x1": float, "y1": float, "x2": float, "y2": float}
+
+
+@functools.lru_cache(maxsize=8)
+def parse_mapping_csv(csv_text: str):
+    """Return (slim CSV text for the prompt, {row number: full CSV record})."""
+    rows = list(csv.DictReader(io.StringIO(csv_text.strip())))
+    columns = [c for c in PROMPT_COLUMNS if rows and c in rows[0]]
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(columns)
+    writer.writerows([r[c] for c in columns] for r in rows)
+    by_row = {int(r["row"]): r for r in rows if (r.get("row") or "").strip().isdigit()}
+    return out.getvalue().strip(), by_row
+
+
+@functools.lru_cache(maxsize=8)
+def prompt_prefix(csv_text: str) -> str:
+    """Instructions + slim CSV: byte-identical for every request against the same form."""
+    return PROMPT_TEMPLATE.format(csv_text=parse_mapping_csv(csv_text)[0])
+
+
+def attach_row_details(fields: List[Dict[str, Any]], csv_text: str) -> List[Dict[str, Any]]:
+    """Copy heading/page/coordinates from the CSV onto each filled row the model returned."""
+    by_row = parse_mapping_csv(csv_text)[1]
+    filled = []
+    for field in fields:
+        record = by_row.get(int(field["row"]))
+        if record is None:
+            continue
+        details = {}
+        for col in ROW_COLUMNS:
+            if col in record:
+                conv = NUMERIC_COLUMNS.get(col)
+                details[col] = conv(record[col]) if conv and record[col] else record[col]
+        filled.append({"row": int(field["row"]), **details, **{k: v for k, v in field.items() if k != "row"}})
+    return filled
+
+
+def prompt_cache_key(csv_text: str) -> str:
+    """Routes calls sharing a prompt prefix to the same cache, so the CSV's tokens are billed as cached."""
+    return hashlib.sha256(prompt_prefix(csv_text).encode("utf-8")).hexdigest()
+
 
-def build_prompt(csv_text: str, user_request: str) -> str:
-    return PROMPT_TEMPLATE.format(csv_text=csv_text.strip(), user_request=user_request.strip())
+def build_prompt(csv_text: str, user_requests: List[str]) -> str:
+    prompt = prompt_prefix(csv_text)
+    if len(user_requests) == 1:
+        return prompt + SINGLE_REQUEST_TEMPLATE.format(user_request=user_requests[0].strip())
+    blocks = "\n\n".join(f"Request [{i}]:\n{req.strip()}" for i, req in enumerate(user_requests, 1))
+    return prompt + BATCH_REQUEST_TEMPLATE.format(count=len(user_requests), request_blocks=blocks)
 
 
-def call_openai(prompt: str, model: str) -> str:
+BATCH_POLL_SECONDS = 30
+BATCH_DONE_STATES = ("completed", "failed", "expired", "cancelled")
+
+
+def make_client(client_cls=OpenAI):
     api_key = os.environ.get("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY is not set in the environment")
 
-    client = OpenAI(
+    return client_cls(
         api_key=api_key,
         base_url=os.environ.get("OPENAI_BASE"),
     )
 
-    completion = client.chat.completions.create(
-        model=model,
-        messages=[
+
+# Request fields older openai SDKs reject as keyword arguments; sent via extra_body instead.
+EXTRA_BODY_FIELDS = ("prompt_cache_key",)
+
+
+def chat_body(prompt: str, model: str, cache_key: Optional[str] = None, request_count: int = 1) -> Dict[str, Any]:
+    body = {
+        "model": model,
+        "messages": [
             {"role": "system", "content": "You are a careful form-filling assistant."},
             {"role": "user", "content": prompt},
         ],
-        temperature=0,
+        "temperature": 0,
+        "response_format": response_format(request_count),
+    }
+    if cache_key:
+        body["prompt_cache_key"] = cache_key
+    return body
+
+
+def sdk_args(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Keyword arguments for chat.completions.create() from a request body."""
+    args = dict(body)
+    extra = {k: args.pop(k) for k in EXTRA_BODY_FIELDS if k in args}
+    if extra:
+        args["extra_body"] = extra
+    return args
+
+
+def call_openai(prompt: str, model: str, cache_key: Optional[str] = None, request_count: int = 1) -> str:
+    client = make_client()
+    # Streamed so long mappings arrive as they are generated rather than after one idle wait.
+    body = chat_body(prompt, model, cache_key, request_count)
+    stream = client.chat.completions.create(**sdk_args(body), stream=True)
+    parts = []
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            parts.append(chunk.choices[0].delta.content)
+    return "".join(parts)
+
+
+_RESET_PART = re.compile(r"([\d.]+)(ms|s|m|h)")
+_RESET_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_reset(value: str) -> float:
+    """Seconds from an x-ratelimit-reset-* header such as "1s", "6m0s" or "20ms"."""
+    return sum(float(n) * _RESET_UNITS[unit] for n, unit in _RESET_PART.findall(value or ""))
+
+
+async def call_openai_async(
+    prompts: List[str], model: str, concurrency: int, cache_key: Optional[str] = None
+) -> List[str]:
+    """
+    Send one chat completion per prompt, at most `concurrency` at a time.
+    When a response reports an exhausted request/token window, new calls
+    wait until that window resets.
+    """
+    client = make_client(AsyncOpenAI)
+    sem = asyncio.Semaphore(concurrency)
+    resume_at = 0.0
+
+    async def one(prompt: str) -> str:
+        nonlocal resume_at
+        async with sem:
+            delay = resume_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            raw = await client.chat.completions.with_raw_response.create(**sdk_args(chat_body(prompt, model, cache_key)))
+            headers = raw.headers
+            for kind in ("requests", "tokens"):
+                if headers.get(f"x-ratelimit-remaining-{kind}") == "0":
+                    wait = parse_reset(headers.get(f"x-ratelimit-reset-{kind}", ""))
+                    resume_at = max(resume_at, time.monotonic() + wait)
+            completion = raw.parse()
+            return completion.choices[0].message.content or ""
+
+    try:
+        return await asyncio.gather(*(one(p) for p in prompts))
+    finally:
+        await client.close()
+
+
+def call_openai_batch(prompts: List[str], model: str, cache_key: Optional[str] = None) -> List[str]:
+    """Run each prompt through the Batch API and return the responses in prompt order."""
+    client = make_client()
+
+    lines = [
+        json.dumps({
+            "custom_id": f"request-{i}",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": chat_body(prompt, model, cache_key),
+        })
+        for i, prompt in enumerate(prompts, 1)
+    ]
+    batch_file = client.files.create(
+        file=("fill_requests.jsonl", "\n".join(lines).encode("utf-8")),
+        purpose="batch",
     )
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    print(f"Submitted batch {batch.id} with {len(prompts)} request(s); polling every {BATCH_POLL_SECONDS}s...")
+
+    while batch.status not in BATCH_DONE_STATES:
+        time.sleep(BATCH_POLL_SECONDS)
+        batch = client.batches.retrieve(batch.id)
+    if batch.status != "completed" or not batch.output_file_id:
+        raise RuntimeError(f"Batch {batch.id} ended with status {batch.status}")
+
+    results: Dict[str, str] = {}
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        body = (record.get("response") or {}).get("body") or {}
+        if record.get("error") or not body.get("choices"):
+            raise RuntimeError(f"Batch request {record.get('custom_id')} failed: {record.get('error') or body}")
+        results[record["custom_id"]] = body["choices"][0]["message"]["content"] or ""
 
-    return completion.choices[0].message.content or ""
+    return [results[f"request-{i}"] for i in range(1, len(prompts) + 1)]
 
 
 def parse_json_mapping(raw_text: str) -> List[Dict[str, Any]]:
     try:
-        return json.loads(raw_text)
-    except json.JSONDecodeError as exc:
+        return orjson.loads(raw_text)
+    except orjson.JSONDecodeError as exc:
         raise ValueError("Model output was not valid JSON") from exc
 
 
+def split_batched_mapping(mapping: Any, count: int) -> List[List[Dict[str, Any]]]:
+    """Return one field list per request, in request order."""
+    if count == 1:
+        return [mapping["fields"] if isinstance(mapping, dict) else mapping]
+    by_index = {}
+    items = mapping["requests"] if isinstance(mapping, dict) else mapping
+    for item in items:
+        by_index[int(item["request_index"])] = item.get("fields") or []
+    missing = [i for i in range(1, count + 1) if i not in by_index]
+    if missing:
+        raise ValueError(f"Model output is missing requests: {missing}")
+    return [by_index[i] for i in range(1, count + 1)]
+
+
+def parse_requests(values: List[str]) -> List[str]:
+    """Accept repeated --request flags, or a single flag holding a JSON list of strings."""
+    if len(values) == 1 and values[0].lstrip().startswith("["):
+        try:
+            parsed = json.loads(values[0])
+        except json.JSONDecodeError:
+            return values
+        if isinstance(parsed, list) and all(isinstance(v, str) for v in parsed):
+            return parsed
+    return values
+
+
+def indexed_path(path: Path, index: int, count: int) -> Path:
+    if count == 1:
+        return path
+    return path.with_name(f"{path.stem}_{index}{path.suffix}")
+
+
 def save_json(mapping: List[Dict[str, Any]], path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     with path.open("w", encoding="utf-8") as f:
@@ -148,7 +385,12 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Generate mapping JSON from a natural-language request and render the overlay.")
     parser.add_argument("--pdf", required=True, help="Path to the blank form PDF")
     parser.add_argument("--csv", required=True, help="Path to the CSV mapping file")
-    parser.add_argument("--request", required=True, help="Natural-language request describing the form contents")
+    parser.add_argument(
+        "--request",
+        required=True,
+        action="append",
+        help="Natural-language request describing the form contents (repeat, or pass a JSON list, to batch)",
+    )
     parser.add_argument("--json-out", default="mapping.json", help="Where to write the JSON mapping")
     parser.add_argument("--pdf-out", default="overlay.pdf", help="Where to write the filled PDF overlay")
     parser.add_argument(
@@ -157,6 +399,17 @@ def main() -> None:
         help="Optional filename for the saved PDF (defaults to --pdf-out or input name).",
     )
     parser.add_argument("--model", default="gpt-4o-mini", help="OpenAI model to use")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=0,
+        help="Send each request as its own call with up to N in flight (default: one combined prompt)",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Submit requests through the OpenAI Batch API (cheaper, asynchronous; may take up to 24h)",
+    )
     args = parser.parse_args()
 
     csv_path = Path(args.csv)
@@ -164,17 +417,34 @@ def main() -> None:
     json_out_path = Path(args.json_out)
     pdf_out_path = resolve_pdf_output_path(pdf_path, args.pdf_out, args.output_name)
 
-    csv_text = read_csv_text(csv_path)
-    prompt = build_prompt(csv_text, args.request)
-    print("Calling OpenAI with prompt built from CSV mapping and user request...")
-    raw_response = call_openai(prompt, args.model)
-
-    mapping = parse_json_mapping(raw_response)
-    save_json(mapping, json_out_path)
-    print(f"Saved JSON mapping to {json_out_path}")
+    requests = parse_requests(args.request)
+    count = len(requests)
 
-    overlay_pdf(str(pdf_path), mapping, str(pdf_out_path))
-    print(f"Saved filled overlay PDF to {pdf_out_path}")
+    csv_text = read_csv_text(csv_path)
+    cache_key = prompt_cache_key(csv_text)
+    if args.batch:
+        prompts = [build_prompt(csv_text, [request]) for request in requests]
+        raws = call_openai_batch(prompts, args.model, cache_key)
+        mappings = [split_batched_mapping(parse_json_mapping(raw), 1)[0] for raw in raws]
+    elif args.concurrency > 0:
+        prompts = [build_prompt(csv_text, [request]) for request in requests]
+        print(f"Calling OpenAI for {count} request(s), {args.concurrency} at a time...")
+        raws = asyncio.run(call_openai_async(prompts, args.model, args.concurrency, cache_key))
+        mappings = [split_batched_mapping(parse_json_mapping(raw), 1)[0] for raw in raws]
+    else:
+        prompt = build_prompt(csv_text, requests)
+        print(f"Calling OpenAI with prompt built from CSV mapping and {count} user request(s)...")
+        raw_response = call_openai(prompt, args.model, cache_key, count)
+        mappings = split_batched_mapping(parse_json_mapping(raw_response), count)
+    for i, mapping in enumerate(mappings, 1):
+        mapping = attach_row_details(mapping, csv_text)
+        json_path = indexed_path(json_out_path, i, count)
+        save_json(mapping, json_path)
+        print(f"Saved JSON mapping to {json_path}")
+
+        out_path = indexed_path(pdf_out_path, i, count)
+        overlay_pdf(str(pdf_path), mapping, str(out_path))
+        print(f"Saved filled overlay PDF to {out_path}")
 
 
 if __name__ == "__main__":
@@ -1,7 +1,78 @@
+import argparse
+import os
 import pikepdf
 import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 
-def clean_pdf_aggressive(input_filename, output_filename):
+# Annotation filters for clean_pdf_aggressive, compiled once.
+BUTTON_NAME = re.compile(r"print|reset|submit|clear", re.I)
+WARNING_NAME = re.compile(r"required|warning", re.I)
+REQUIRED_VALUE = re.compile(r"required", re.I)
+RED_APPEARANCE = re.compile(r"1 0 0 (?:rg|RG)")
+
+# Per-annotation log lines only when PDFCRUSH_VERBOSE is set; a summary is always printed.
+VERBOSE = bool(os.environ.get("PDFCRUSH_VERBOSE"))
+
+# Below this many pages the process start-up costs more than the scan.
+PARALLEL_MIN_PAGES = 50
+
+def removal_reason(annot):
+    """Log label for a button/warning annotation that should be removed, or None to keep it."""
+    # Get basic info (each .get() crosses into qpdf, so read once)
+    subtype = annot.get("/Subtype")
+    field_name = str(annot.get("/T", ""))
+
+    # CHECK A: Is it a Print/Reset Button?
+    # Delete if it has "Print", "Reset", "Submit" or "Clear" in the name
+    if subtype == "/Widget" and annot.get("/FT") == "/Btn" and BUTTON_NAME.search(field_name):
+        return "Removing Button"
+
+    # CHECK B: Is it a "REQUIRED" text warning?
+    # We look for fields named "Required", "Warning" OR fields that display that text.
+    # Many TTB warnings are just Text Fields (/Tx) named things like "Text1.0.1"
+    # so we check their Default Value (/V) or Default Appearance (/DA) for red color.
+
+    # Check field name for "Required"
+    if WARNING_NAME.search(field_name):
+        return "Removing Warning Field (by Name)"
+
+    # Check field content (Value) for "REQUIRED"
+    if REQUIRED_VALUE.search(str(annot.get("/V", ""))):
+        return "Removing Warning Field (by Content)"
+
+    # CHECK C: Is it RED text? (Common for warnings)
+    # We look at the /DA (Default Appearance) string.
+    # Red is usually "1 0 0 rg" (RGB) or "0 1 1 0 k" (CMYK)
+    # Double check it's not a field YOU fill in (usually you type in black 0 g)
+    # Most warnings are read-only (/Ff 1)
+    if RED_APPEARANCE.search(str(annot.get("/DA", ""))) and int(annot.get("/Ff", 0)) & 1:
+        return "Removing Red Read-Only Field"
+
+    return None
+
+def _scan_pages(pdf, page_indices):
+    """[(page_index, [(annot_index, reason, field_name), ...]), ...] for pages with something to remove."""
+    scanned = []
+    for page_num in page_indices:
+        page = pdf.pages[page_num]
+        if "/Annots" not in page:
+            continue
+        hits = []
+        for i, annot in enumerate(page.Annots):
+            reason = removal_reason(annot)
+            if reason:
+                hits.append((i, reason, str(annot.get("/T", ""))))
+        if hits:
+            scanned.append((page_num, hits))
+    return scanned
+
+def scan_pages(input_filename, page_indices):
+    """Process-pool worker: scan a range of pages from its own copy of the file."""
+    with pikepdf.open(input_filename) as pdf:
+        return _scan_pages(pdf, page_indices)
+
+def clean_pdf_aggressive(input_filename, output_filename, linearize=False, workers=None):
     # Open PDF
     pdf = pikepdf.Pdf.open(input_filename, allow_overwriting_input=True)
     print(f"Processing: {input_filename}")
@@ -26,65 +97,55 @@ def clean_pdf_aggressive(input_filename, output_filename):
         print(" - Removed Embedded JavaScripts")
 
     # --- 3. REMOVE BUTTONS & "REQUIRED" WARNINGS ---
+    # Pages are scanned independently; big documents are split across worker processes
+    # (each opens its own read-only copy) and the removals are applied here.
+    n_pages = len(pdf.pages)
+    workers = min(workers or os.cpu_count() or 1, n_pages)
+    if workers > 1 and n_pages >= PARALLEL_MIN_PAGES:
+        size = -(-n_pages // workers)
+        chunks = [range(start, min(start + size, n_pages)) for start in range(0, n_pages, size)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            scanned = [hit for part in pool.map(scan_pages, [input_filename] * len(chunks), chunks) for hit in part]
+    else:
+        scanned = _scan_pages(pdf, range(n_pages))
+
     total_removed = 0
-    
-    for page_num, page in enumerate(pdf.pages):
-        if "/Annots" not in page:
-            continue
-        
-        new_annots = []
-        for annot in page.Annots:
-            should_keep = True
-            
-            # Get basic info
-            subtype = annot.get("/Subtype")
-            field_name = str(annot.get("/T", ""))
-            
-            # CHECK A: Is it a Print/Reset Button?
-            if subtype == "/Widget" and annot.get("/FT") == "/Btn":
-                # Delete if it has "Print", "Reset", or "Submit" in the name
-                if any(x in field_name.lower() for x in ["print", "reset", "submit", "clear"]):
-                    print(f"   [Page {page_num+1}] Removing Button: {field_name}")
-                    should_keep = False
-
-            # CHECK B: Is it a "REQUIRED" text warning?
-            # We look for fields named "Required", "Warning" OR fields that display that text.
-            # Many TTB warnings are just Text Fields (/Tx) named things like "Text1.0.1"
-            # so we check their Default Value (/V) or Default Appearance (/DA) for red color.
-            
-            # Check field name for "Required"
-            if "required" in field_name.lower() or "warning" in field_name.lower():
-                print(f"   [Page {page_num+1}] Removing Warning Field (by Name): {field_name}")
-                should_keep = False
-            
-            # Check field content (Value) for "REQUIRED"
-            val = str(annot.get("/V", ""))
-            if "REQUIRED" in val.upper():
-                print(f"   [Page {page_num+1}] Removing Warning Field (by Content): {field_name}")
-                should_keep = False
-
-            # CHECK C: Is it RED text? (Common for warnings)
-            # We look at the /DA (Default Appearance) string.
-            # Red is usually "1 0 0 rg" (RGB) or "0 1 1 0 k" (CMYK)
-            da_str = str(annot.get("/DA", ""))
-            if "1 0 0 rg" in da_str or "1 0 0 RG" in da_str:
-                # Double check it's not a field YOU fill in (usually you type in black 0 g)
-                # Most warnings are read-only (/Ff 1)
-                flags = int(annot.get("/Ff", 0))
-                if flags & 1: # If ReadOnly bit is set
-                    print(f"   [Page {page_num+1}] Removing Red Read-Only Field: {field_name}")
-                    should_keep = False
-
-            if should_keep:
-                new_annots.append(annot)
-
-        page.Annots = new_annots
-        total_removed += (len(page.Annots) - len(new_annots)) * -1
-
-    # Save
-    pdf.save(output_filename)
+    by_reason = Counter()
+    for page_num, hits in scanned:
+        annots = pdf.pages[page_num].Annots
+        for annot_index, reason, field_name in hits:
+            if VERBOSE:
+                print(f"   [Page {page_num+1}] {reason}: {field_name}")
+            by_reason[reason] += 1
+        # Delete in place from the back so earlier indices stay valid (cheaper than rebuilding the array)
+        for annot_index, _, _ in reversed(hits):
+            del annots[annot_index]
+        total_removed += len(hits)
+
+    print(f" - Removed {total_removed} button/warning annotations")
+    for reason, count in by_reason.most_common():
+        print(f"   {reason}: {count}")
+
+    # Save: pack objects into compressed object streams and re-deflate content streams
+    pdf.save(
+        output_filename,
+        object_stream_mode=pikepdf.ObjectStreamMode.generate,
+        compress_streams=True,
+        recompress_flate=True,
+        linearize=linearize,
+    )
     print(f"\nDone! Saved as: {output_filename}")
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Strip XFA, scripts, print/reset buttons and REQUIRED warnings from a PDF form.")
+    parser.add_argument("input", nargs="?", default="f500024sm.pdf", help="PDF to clean")
+    parser.add_argument("output", nargs="?", default="cleaned_aggressive.pdf", help="Where to write the cleaned PDF")
+    parser.add_argument("--linearize", action="store_true", help="Write a linearized (fast web view) PDF")
+    parser.add_argument("--workers", type=int, default=None, help="Processes for scanning large PDFs (default: CPU count)")
+    args = parser.parse_args(argv)
+    clean_pdf_aggressive(args.input, args.output, linearize=args.linearize, workers=args.workers)
+
 # --- EXECUTE ---
 # Make sure to verify your filename matches exactly!
-clean_pdf_aggressive('f500024sm.pdf', 'cleaned_aggressive.pdf')
\ No newline at end of file
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -2,10 +2,20 @@
 import sys
 import csv
 import os
+from collections import OrderedDict
 from dataclasses import dataclass
+from operator import attrgetter
 from typing import List
 
 import fitz  # PyMuPDF
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+except ImportError:  # optional: without numba large pages are partitioned with plain NumPy too
+    def njit(*args, **kwargs):
+        return lambda fn: fn
 
 from PySide6.QtWidgets import (
     QApplication,
@@ -16,6 +26,7 @@ from PySide6.QtWidgets import (
     QHBoxLayout,
     QGraphicsView,
     QGraphicsScene,
+    QGraphicsPixmapItem,
     QGraphicsRectItem,
     QGraphicsLineItem,
     QGraphicsTextItem,
@@ -23,18 +34,74 @@ from PySide6.QtWidgets import (
     QLabel,
     QSpinBox,
     QGraphicsItem,
-    QGraphicsDropShadowEffect,
 )
-from PySide6.QtGui import QPixmap, QImage, QPen, QColor, QBrush
-from PySide6.QtCore import Qt, QRectF, QPointF
+from PySide6.QtGui import QPixmap, QImage, QPen, QColor, QBrush, QTransform
+from PySide6.QtCore import Qt, QRectF, QPointF, QObject, QRunnable, QThreadPool, QTimer, Signal
 
 
 # Padding around the PDF so pills are always in-frame
 MARGIN_X = 350
 MARGIN_Y = 200
 
+# Typing in a pill re-fits it and its line at most once per this many ms
+GEOMETRY_DEBOUNCE_MS = 30
+
+# Rendered page backgrounds kept around for fast page flipping
+PIXMAP_CACHE_PAGES = 8
+
+# Scene units per PDF point. Layout (margins, pills, lines) is in scene units; the page
+# raster may be rendered at a different density and scaled onto this grid.
+SCENE_ZOOM = 2.0
+# Re-render once the view needs this much more density than the current raster has...
+RERENDER_FACTOR = 1.5
+# ...up to this many pixels per PDF point
+MAX_RENDER_ZOOM = 4.0
+
+
+# Pages with at least this many fields are partitioned by the numba-compiled kernel; below it
+# plain NumPy is already fast and the first-use compile would cost more than it saves
+NUMBA_MIN_FIELDS = 2000
+
+
+# CSV column -> dtype, in FieldRow field order. Text columns stay str ("" for blanks).
+CSV_DTYPES = {
+    "row": "int64",
+    "heading": str,
+    "subheading": str,
+    "form_entry_description": str,
+    "x1": "float64",
+    "y1": "float64",
+    "x2": "float64",
+    "y2": "float64",
+    "page": "int64",
+    "rich_description": str,
+}
+
+
+def _partition_and_sort(x1, y1, x2, y2, mid_x):
+    left = (x1 + x2) * 0.5 < mid_x
+    cy = y1 + y2
+    left_pos = np.nonzero(left)[0]
+    right_pos = np.nonzero(~left)[0]
+    left_pos = left_pos[np.argsort(cy[left_pos], kind="mergesort")]
+    right_pos = right_pos[np.argsort(cy[right_pos], kind="mergesort")]
+    return left_pos, right_pos
+
+
+# Compiled lazily on first call, so a page that never crosses NUMBA_MIN_FIELDS never pays the JIT
+_partition_and_sort_jit = njit(cache=True)(_partition_and_sort)
+
+
+def partition_and_sort(x1, y1, x2, y2, mid_x):
+    """
+    Split fields into left/right of mid_x by x center, each sorted (stably) by
+    vertical center. Returns positions into the input arrays.
+    """
+    impl = _partition_and_sort_jit if len(x1) >= NUMBA_MIN_FIELDS else _partition_and_sort
+    return impl(x1, y1, x2, y2, mid_x)
+
 
-@dataclass
+@dataclass(slots=True)
 class FieldRow:
     row: int
     heading: str
@@ -66,6 +133,11 @@ class LabelPill(QGraphicsRectItem):
         self.prefix_item.setHtml(
             f'<span style="color:#f9a8d4;font-weight:bold;">{self.row_prefix}</span>'
         )
+        self.prefix_item.setPos(0, 0)
+        # The prefix never changes, so measure it once rather than on every keystroke
+        prefix_rect = self.prefix_item.boundingRect()
+        self._prefix_width = prefix_rect.width()
+        self._prefix_height = prefix_rect.height()
 
         # Editable description text
         self.desc_item = QGraphicsTextItem(self)
@@ -76,6 +148,13 @@ class LabelPill(QGraphicsRectItem):
         self.desc_item.setFlag(QGraphicsItem.ItemIsFocusable, True)
         self.desc_item.document().contentsChanged.connect(self.on_desc_changed)
 
+        # A burst of keystrokes re-fits the pill once. Graphics items aren't QObjects, so
+        # the timer hangs off the text document, which lives and dies with this pill.
+        self._geometry_timer = QTimer(self.desc_item.document())
+        self._geometry_timer.setSingleShot(True)
+        self._geometry_timer.setInterval(GEOMETRY_DEBOUNCE_MS)
+        self._geometry_timer.timeout.connect(self.flush_geometry)
+
         # Compute pill rect around combined text
         self.update_geometry()
 
@@ -91,16 +170,13 @@ class LabelPill(QGraphicsRectItem):
         self.setZValue(10)
 
     def update_geometry(self):
-        prefix_rect = self.prefix_item.boundingRect()
-        self.prefix_item.setPos(0, 0)
-
         # Position description after prefix
-        self.desc_item.setPos(prefix_rect.width() + self.gap, 0)
+        self.desc_item.setPos(self._prefix_width + self.gap, 0)
         self.desc_item.setTextWidth(self.text_width)
         desc_rect = self.desc_item.boundingRect()
 
-        content_width = prefix_rect.width() + self.gap + desc_rect.width()
-        content_height = max(prefix_rect.height(), desc_rect.height())
+        content_width = self._prefix_width + self.gap + desc_rect.width()
+        content_height = max(self._prefix_height, desc_rect.height())
 
         self.setRect(
             -self.padding_x,
@@ -108,11 +184,16 @@ class LabelPill(QGraphicsRectItem):
             content_width + 2 * self.padding_x,
             content_height + 2 * self.padding_y,
         )
+        # Top-level and untransformed, so scene center = pos() + this (see FieldGraphics.update_line)
+        self.center_offset = self.rect().center()
 
     def description_text(self) -> str:
         return self.desc_item.toPlainText()
 
     def on_desc_changed(self):
+        self._geometry_timer.start()
+
+    def flush_geometry(self):
         self.update_geometry()
         if self.wrapper is not None:
             self.wrapper.update_line()
@@ -133,17 +214,16 @@ class DraggableRectItem(QGraphicsRectItem):
     """
     Draggable field box on the PDF; moves arrow head and updates coords.
     """
-    def __init__(self, wrapper, rect: QRectF, color: QColor):
+    def __init__(self, wrapper, rect: QRectF, pen: QPen, brush: QBrush):
         super().__init__(rect)
         self.wrapper = wrapper
+        # The rect itself never changes, only pos() does while dragging
+        self.center_offset = rect.center()
         self.setFlag(QGraphicsItem.ItemIsMovable, True)
         self.setFlag(QGraphicsItem.ItemSendsScenePositionChanges, True)
 
-        pen = QPen(color, 2)
-        pen.setCapStyle(Qt.RoundCap)
-        pen.setJoinStyle(Qt.RoundJoin)
         self.setPen(pen)
-        self.setBrush(QBrush(QColor(color.red(), color.green(), color.blue(), 40)))
+        self.setBrush(brush)
 
     def itemChange(self, change, value):
         if change == QGraphicsItem.ItemPositionChange and self.wrapper is not None:
@@ -151,6 +231,29 @@ class DraggableRectItem(QGraphicsRectItem):
         return super().itemChange(change, value)
 
 
+class GlowLineItem(QGraphicsLineItem):
+    """
+    Line with a soft white halo, drawn as a wide translucent stroke under the
+    colored one (a drop-shadow effect would need an offscreen blur per line).
+    """
+    GLOW_WIDTH = 7.0
+
+    def __init__(self):
+        super().__init__()
+        self.glow_pen = QPen(QColor(255, 255, 255, 120), self.GLOW_WIDTH, Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin)
+
+    def boundingRect(self):
+        extra = max(0.0, (self.GLOW_WIDTH - self.pen().widthF()) / 2)
+        return super().boundingRect().adjusted(-extra, -extra, extra, extra)
+
+    def paint(self, painter, option, widget=None):
+        line = self.line()
+        painter.setPen(self.glow_pen)
+        painter.drawLine(line)
+        painter.setPen(self.pen())
+        painter.drawLine(line)
+
+
 class FieldGraphics:
     """
     Container tying together: label pill, box rect, and line between them.
@@ -163,12 +266,15 @@ class FieldGraphics:
         label_width: float,
         scale_x: float,
         scale_y: float,
-        color: QColor,
+        styles: "tuple[QPen, QPen, QBrush]",
+        coords=None,
     ):
         self.scene = scene
         self.field = field
         self.scale_x = scale_x
         self.scale_y = scale_y
+        # This field's row of the window's coordinate array, kept in step on drag
+        self.coords = coords
 
         # Movable pill + text
         self.label_pill = LabelPill(self, field, label_pos, label_width)
@@ -181,32 +287,29 @@ class FieldGraphics:
         y2_scene = field.y2 * scale_y
         rect = QRectF(x1_scene, y1_scene, x2_scene - x1_scene, y2_scene - y1_scene)
 
-        self.rect_item = DraggableRectItem(self, rect, color)
+        line_pen, rect_pen, rect_brush = styles
+        self.rect_item = DraggableRectItem(self, rect, rect_pen, rect_brush)
         scene.addItem(self.rect_item)
 
         # Line with glow
-        self.line_item = QGraphicsLineItem()
-        pen = QPen(color, 3.0)
-        pen.setCapStyle(Qt.RoundCap)
-        pen.setJoinStyle(Qt.RoundJoin)
-        self.line_item.setPen(pen)
-
-        effect = QGraphicsDropShadowEffect()
-        effect.setBlurRadius(6)
-        effect.setOffset(0, 0)
-        glow_color = QColor(255, 255, 255, 180)
-        effect.setColor(glow_color)
-        self.line_item.setGraphicsEffect(effect)
+        self.line_item = GlowLineItem()
+        self.line_item.setPen(line_pen)
 
         scene.addItem(self.line_item)
 
         self.update_line()
 
+    # Both items sit directly in the scene with no transform, so their scene-space
+    # centers are just position + cached offset (no mapToScene per drag event).
     def label_center(self) -> QPointF:
-        return self.label_pill.mapToScene(self.label_pill.rect().center())
+        return self.label_pill.pos() + self.label_pill.center_offset
 
     def box_center(self) -> QPointF:
-        return self.rect_item.mapToScene(self.rect_item.rect().center())
+        return self.rect_item.pos() + self.rect_item.center_offset
+
+    def remove(self):
+        for item in (self.label_pill, self.rect_item, self.line_item):
+            self.scene.removeItem(item)
 
     def update_line(self):
         tail = self.label_center()
@@ -225,6 +328,8 @@ class FieldGraphics:
         self.field.y1 = y1_scene / self.scale_y
         self.field.x2 = x2_scene / self.scale_x
         self.field.y2 = y2_scene / self.scale_y
+        if self.coords is not None:
+            self.coords[:] = (self.field.x1, self.field.y1, self.field.x2, self.field.y2)
 
     def sync_field_data(self):
         self.update_from_scene()
@@ -235,6 +340,8 @@ class ZoomableGraphicsView(QGraphicsView):
     """
     Ctrl/⌘ + mouse wheel to zoom; plain wheel to scroll.
     """
+    zoomed = Signal()
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._zoom = 0
@@ -248,10 +355,43 @@ class ZoomableGraphicsView(QGraphicsView):
                 factor = 0.8
                 self._zoom -= 1
             self.scale(factor, factor)
+            self.zoomed.emit()
         else:
             super().wheelEvent(event)
 
 
+class RenderSignals(QObject):
+    # page_index, zoom, fitz.Pixmap (owner of the image's buffer), QImage
+    finished = Signal(int, float, object, object)
+
+
+class PageRenderJob(QRunnable):
+    """
+    Rasterizes one page off the GUI thread. The window runs these on a one-thread pool,
+    so fitz is only ever driven from a single thread at a time.
+    """
+    def __init__(self, doc, page_index: int, zoom: float):
+        super().__init__()
+        # The window holds a reference until run() has returned (see on_page_rendered)
+        self.setAutoDelete(False)
+        self.doc = doc
+        self.page_index = page_index
+        self.zoom = zoom
+        self.signals = RenderSignals()
+
+    def run(self):
+        pix = image = None
+        try:
+            pix = self.doc[self.page_index].get_pixmap(matrix=fitz.Matrix(self.zoom, self.zoom))
+            img_format = QImage.Format_RGBA8888 if pix.alpha else QImage.Format_RGB888
+            # Wrap MuPDF's sample buffer directly (no bytes copy, no QImage.copy()); the
+            # Pixmap travels with the image and is kept alive as long as the cache entry.
+            image = QImage(pix.samples_mv, pix.width, pix.height, pix.stride, img_format)
+        except Exception as e:
+            print(f"Could not render page {self.page_index + 1}: {e}")
+        self.signals.finished.emit(self.page_index, self.zoom, pix, image)
+
+
 class FormMapperWindow(QMainWindow):
     def __init__(self, pdf_path: str, csv_path: str):
         super().__init__()
@@ -261,18 +401,48 @@ class FormMapperWindow(QMainWindow):
         self.csv_path = csv_path
 
         self.doc = fitz.open(pdf_path)
+        # Page sizes up front, so laying out a page never touches fitz while a render runs
+        self._page_sizes = [(page.rect.width, page.rect.height) for page in self.doc]
         self.fields: List[FieldRow] = self.load_csv(csv_path)
+        # Struct-of-arrays copy of the field geometry for per-page layout math
+        self._coords = np.array([(f.x1, f.y1, f.x2, f.y2) for f in self.fields], dtype=np.float64).reshape(-1, 4)
+        self._pages = np.array([f.page for f in self.fields], dtype=np.int64)
 
         self.scene = QGraphicsScene(self)
+        # Every pill/box is draggable and nothing does spatial queries on the scene, so a
+        # BSP index would only be rebuilt on each drag step; a linear scan is cheaper here.
+        self.scene.setItemIndexMethod(QGraphicsScene.NoIndex)
         self.view = ZoomableGraphicsView(self.scene)
         self.view.setRenderHints(self.view.renderHints())
         self.view.setBackgroundBrush(QBrush(QColor(10, 15, 35)))
+        self.view.zoomed.connect(self.update_page_resolution)
+
+        # One background item for the window's lifetime; page switches only swap its pixmap
+        self.bg_item = QGraphicsPixmapItem()
+        self.bg_item.setZValue(-100)
+        self.bg_item.setTransformationMode(Qt.SmoothTransformation)
+        self.scene.addItem(self.bg_item)
 
         self.current_page_index = 0
         self.scale_x = 1.0
         self.scale_y = 1.0
         self.field_graphics: List[FieldGraphics] = []
         self.current_zoom = 1.0
+        # (page_index, zoom) of the raster bg_item shows or is waiting for
+        self._bg_request = (0, SCENE_ZOOM)
+        # Page rendering happens off the GUI thread, one page at a time
+        self._render_pool = QThreadPool(self)
+        self._render_pool.setMaxThreadCount(1)
+        self._render_jobs: "dict[tuple[int, float], PageRenderJob]" = {}
+        # Last job whose result arrived. Its run() may still be unwinding past the emit, so it
+        # is only released once the next job finishes (the single pool thread has left it by then)
+        self._finished_job = None
+        # (page_index, render zoom) -> pixmap, least recently used first
+        self._pix_cache: "OrderedDict[tuple[int, float], QPixmap]" = OrderedDict()
+        # color rgba -> (line pen, box pen, box brush), shared by every field in that color
+        self._style_cache: "dict[int, tuple[QPen, QPen, QBrush]]" = {}
+        # fitz Pixmaps whose sample buffers back the cached QPixmaps (see on_page_rendered)
+        self._fitz_pix: dict = {}
 
         self.init_ui()
         self.load_page(0)
@@ -293,6 +463,8 @@ class FormMapperWindow(QMainWindow):
         self.page_spin.setMinimum(1)
         self.page_spin.setMaximum(self.doc.page_count)
         self.page_spin.setValue(1)
+        # Typing "12" shouldn't load page 1 on the way; arrows still switch immediately
+        self.page_spin.setKeyboardTracking(False)
         self.page_spin.valueChanged.connect(self.on_page_changed)
         top_bar.addWidget(self.page_spin)
 
@@ -338,89 +510,62 @@ class FormMapperWindow(QMainWindow):
         bottom_bar.addWidget(submit_button)
 
     def load_csv(self, path: str) -> List[FieldRow]:
-        fields: List[FieldRow] = []
-        with open(path, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                fields.append(
-                    FieldRow(
-                        row=int(row["row"]),
-                        heading=row["heading"],
-                        subheading=row["subheading"],
-                        form_entry_description=row["form_entry_description"],
-                        x1=float(row["x1"]),
-                        y1=float(row["y1"]),
-                        x2=float(row["x2"]),
-                        y2=float(row["y2"]),
-                        page=int(row["page"]),
-                        rich_description=row["rich_description"],
-                    )
-                )
-        return fields
+        # Numeric columns are parsed in C by pandas; tolist() hands back plain Python values
+        df = pd.read_csv(
+            path,
+            usecols=list(CSV_DTYPES),
+            dtype=CSV_DTYPES,
+            keep_default_na=False,
+            encoding="utf-8",
+        )
+        columns = [df[name].tolist() for name in CSV_DTYPES]
+        return [FieldRow(*values) for values in zip(*columns)]
 
     def on_page_changed(self, value: int):
+        if value - 1 == self.current_page_index:
+            return
         self.persist_current_page_state()
         self.load_page(value - 1)
 
     def load_page(self, page_index: int):
+        # Rebuild with painting paused so the view repaints once instead of
+        # after every added item. Scene signals stay live: the view needs
+        # sceneRectChanged to pick up the new page's scroll range.
+        self.view.setUpdatesEnabled(False)
+        try:
+            self._build_page(page_index)
+        finally:
+            self.view.setUpdatesEnabled(True)
+            self.view.viewport().update()
+
+    def _build_page(self, page_index: int):
         self.current_page_index = page_index
-        self.scene.clear()
+        for fg in self.field_graphics:
+            fg.remove()
         self.field_graphics.clear()
         self.reset_zoom()
 
-        page = self.doc[page_index]
-
-        zoom = 2.0
-        mat = fitz.Matrix(zoom, zoom)
-        pix = page.get_pixmap(matrix=mat)
-
-        if pix.alpha:
-            img_format = QImage.Format_RGBA8888
-        else:
-            img_format = QImage.Format_RGB888
-
-        image = QImage(pix.samples, pix.width, pix.height, pix.stride, img_format).copy()
-        pixmap = QPixmap.fromImage(image)
-
-        bg_item = self.scene.addPixmap(pixmap)
-        bg_item.setZValue(-100)
+        pdf_width, pdf_height = self._page_sizes[page_index]
+        self.set_background(page_index, self.view_render_zoom())
+        self.scale_x = self.scale_y = SCENE_ZOOM
+        pix_width = pdf_width * SCENE_ZOOM
+        pix_height = pdf_height * SCENE_ZOOM
 
         # Scene rect with thick margins
         self.scene.setSceneRect(
             -MARGIN_X,
             -MARGIN_Y,
-            pix.width + 2 * MARGIN_X,
-            pix.height + 2 * MARGIN_Y,
+            pix_width + 2 * MARGIN_X,
+            pix_height + 2 * MARGIN_Y,
         )
 
-        page_rect = page.rect
-        pdf_width = page_rect.width
-        pdf_height = page_rect.height
-
-        self.scale_x = pix.width / pdf_width
-        self.scale_y = pix.height / pdf_height
-
         page_num = page_index + 1
-        page_fields = [f for f in self.fields if f.page == page_num]
-
-        # Left/right groups based on x center
-        mid_x_pdf = pdf_width / 2.0
-        left_fields = []
-        right_fields = []
-        for f in page_fields:
-            cx = (f.x1 + f.x2) / 2.0
-            (left_fields if cx < mid_x_pdf else right_fields).append(f)
-
-        # Sort each group by vertical center to minimize crossings
-        def center_y(fr: FieldRow) -> float:
-            return (fr.y1 + fr.y2) / 2.0
-
-        left_fields.sort(key=center_y)
-        right_fields.sort(key=center_y)
+        left_idx, right_idx = self.page_field_order(page_num, pdf_width / 2.0)
+        page_field_count = len(left_idx) + len(right_idx)
 
         label_width = MARGIN_X - 80
         left_x = -MARGIN_X + 40
-        right_x = pix.width + 40
+        right_x = pix_width + 40
         y_start = -MARGIN_Y + 40
         y_step = 55
 
@@ -430,43 +575,144 @@ class FormMapperWindow(QMainWindow):
         ]
 
         # Left side labels
-        for idx, field in enumerate(left_fields):
+        for idx, field_index in enumerate(left_idx):
             label_pos = QPointF(left_x, y_start + idx * y_step)
             color = colors[idx % len(colors)]
             fg = FieldGraphics(
                 scene=self.scene,
-                field=field,
+                field=self.fields[field_index],
                 label_pos=label_pos,
                 label_width=label_width,
                 scale_x=self.scale_x,
                 scale_y=self.scale_y,
-                color=color,
+                styles=self.styles_for(color),
+                coords=self._coords[field_index],
             )
             self.field_graphics.append(fg)
 
         # Right side labels
-        for idx, field in enumerate(right_fields):
+        for idx, field_index in enumerate(right_idx):
             label_pos = QPointF(right_x, y_start + idx * y_step)
             color = colors[idx % len(colors)]
             fg = FieldGraphics(
                 scene=self.scene,
-                field=field,
+                field=self.fields[field_index],
                 label_pos=label_pos,
                 label_width=label_width,
                 scale_x=self.scale_x,
                 scale_y=self.scale_y,
-                color=color,
+                styles=self.styles_for(color),
+                coords=self._coords[field_index],
             )
             self.field_graphics.append(fg)
 
         self.status_label.setText(
-            f"Loaded page {page_num} with {len(page_fields)} fields"
+            f"Loaded page {page_num} with {page_field_count} fields"
+        )
+
+    def styles_for(self, color: QColor):
+        key = color.rgba()
+        styles = self._style_cache.get(key)
+        if styles is None:
+            line_pen = QPen(color, 3.0)
+            line_pen.setCapStyle(Qt.RoundCap)
+            line_pen.setJoinStyle(Qt.RoundJoin)
+            rect_pen = QPen(color, 2)
+            rect_pen.setCapStyle(Qt.RoundCap)
+            rect_pen.setJoinStyle(Qt.RoundJoin)
+            rect_brush = QBrush(QColor(color.red(), color.green(), color.blue(), 40))
+            styles = self._style_cache[key] = (line_pen, rect_pen, rect_brush)
+        return styles
+
+    def page_field_order(self, page_num: int, mid_x_pdf: float):
+        """
+        Indices into self.fields for one page, split into left/right groups by
+        x center and each sorted by vertical center to minimize line crossings.
+        """
+        idx = np.flatnonzero(self._pages == page_num)
+        coords = self._coords[idx]
+        left_pos, right_pos = partition_and_sort(
+            coords[:, 0], coords[:, 1], coords[:, 2], coords[:, 3], mid_x_pdf
         )
+        return idx[left_pos].tolist(), idx[right_pos].tolist()
+
+    def view_render_zoom(self) -> float:
+        """Pixels per PDF point needed for the page to look sharp at the view's current scale."""
+        return min(MAX_RENDER_ZOOM, SCENE_ZOOM * self.view.transform().m11())
+
+    def set_background(self, page_index: int, zoom: float):
+        """
+        Show the page raster at `zoom`: straight away from the cache, otherwise once the
+        render pool delivers it (see on_page_rendered).
+        """
+        key = (page_index, round(zoom, 3))
+        same_page = self._bg_request[0] == page_index
+        self._bg_request = key
+
+        pixmap = self._pix_cache.get(key)
+        if pixmap is not None:
+            self._pix_cache.move_to_end(key)
+            self.show_background(page_index, pixmap)
+            return
+
+        # Don't leave the previous page's raster under this page's fields while rendering
+        if not same_page:
+            self.bg_item.setPixmap(QPixmap())
+        if key in self._render_jobs:
+            return
+        # Superseded requests that haven't started are dropped (tryTake only succeeds for those);
+        # a running one stays referenced and still lands in the cache
+        for old_key, old_job in list(self._render_jobs.items()):
+            if self._render_pool.tryTake(old_job):
+                del self._render_jobs[old_key]
+
+        job = PageRenderJob(self.doc, page_index, key[1])
+        job.signals.finished.connect(self.on_page_rendered)
+        self._render_jobs[key] = job
+        self._render_pool.start(job)
+
+    def on_page_rendered(self, page_index: int, zoom: float, pix, image):
+        key = (page_index, round(zoom, 3))
+        job = self._render_jobs.pop(key, None)
+        if job is not None:
+            self._finished_job = job
+        if image is None:
+            return
+
+        pixmap = QPixmap.fromImage(image)
+        self._pix_cache[key] = pixmap
+        # QPixmap.fromImage may share rather than copy the image buffer, which is MuPDF's
+        self._fitz_pix[key] = pix
+        if len(self._pix_cache) > PIXMAP_CACHE_PAGES:
+            evicted, _ = self._pix_cache.popitem(last=False)
+            self._fitz_pix.pop(evicted, None)
+
+        if key == self._bg_request:
+            self.show_background(page_index, pixmap)
+
+    def show_background(self, page_index: int, pixmap: QPixmap):
+        # Stretch to the exact scene size; per-axis because rendering rounds to whole pixels
+        pdf_width, pdf_height = self._page_sizes[page_index]
+        self.bg_item.setPixmap(pixmap)
+        self.bg_item.setTransform(QTransform.fromScale(
+            pdf_width * SCENE_ZOOM / pixmap.width(),
+            pdf_height * SCENE_ZOOM / pixmap.height(),
+        ))
+
+    def update_page_resolution(self):
+        """
+        Swap in a denser raster once the user zooms past what the current one can show.
+        Zooming back out keeps the sharper raster; page loads start from the view again.
+        """
+        zoom = self.view_render_zoom()
+        if zoom > self._bg_request[1] * RERENDER_FACTOR:
+            self.set_background(self.current_page_index, zoom)
 
     def zoom_in(self):
         factor = 1.25
         self.current_zoom *= factor
         self.view.scale(factor, factor)
+        self.update_page_resolution()
 
     def zoom_out(self):
         factor = 0.8
@@ -481,6 +727,12 @@ class FormMapperWindow(QMainWindow):
         for fg in self.field_graphics:
             fg.sync_field_data()
 
+    def closeEvent(self, event):
+        # Queued renders are dropped; a running one finishes before its job and the doc go away
+        self._render_pool.clear()
+        self._render_pool.waitForDone()
+        super().closeEvent(event)
+
     def on_submit(self):
         # Sync any moved boxes
         for fg in self.field_graphics:
@@ -489,37 +741,14 @@ class FormMapperWindow(QMainWindow):
         base, ext = os.path.splitext(self.csv_path)
         out_path = base + "_corrected.csv"
 
-        fieldnames = [
-            "row",
-            "heading",
-            "subheading",
-            "form_entry_description",
-            "x1",
-            "y1",
-            "x2",
-            "y2",
-            "page",
-            "rich_description",
-        ]
+        # Same columns, same order as the FieldRow fields
+        fieldnames = list(CSV_DTYPES)
+        row_values = attrgetter(*fieldnames)
 
-        with open(out_path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            for fr in sorted(self.fields, key=lambda r: r.row):
-                writer.writerow(
-                    {
-                        "row": fr.row,
-                        "heading": fr.heading,
-                        "subheading": fr.subheading,
-                        "form_entry_description": fr.form_entry_description,
-                        "x1": fr.x1,
-                        "y1": fr.y1,
-                        "x2": fr.x2,
-                        "y2": fr.y2,
-                        "page": fr.page,
-                        "rich_description": fr.rich_description,
-                    }
-                )
+        with open(out_path, "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
+            writer = csv.writer(f)
+            writer.writerow(fieldnames)
+            writer.writerows(row_values(fr) for fr in sorted(self.fields, key=attrgetter("row")))
 
         self.status_label.setText(f"Saved corrected CSV -> {out_path}")
         QMessageBox.information(self, "Saved", f"Saved corrected CSV to:\n{out_path}")
@@ -4,123 +4,290 @@ extract_form_gem4.py  –  v7  (XREF Edition)
 Usage:  python extract_form_gem4.py path/to/form.pdf
 """
 
-import sys, os, csv, fitz  # PyMuPDF
+import sys, os, csv, json, hashlib, fitz  # PyMuPDF
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 
-def get_widget_label(doc, page, w, max_dist=200, vert_pad=2):
-    # (Same label logic as before...)
-    tooltip = ""
+# Labels per PDF (by content hash) and widget xref, one JSON file per PDF in a directory shared
+# across runs, so re-running the same form template skips the label search entirely.
+# Read at call time (app.py points it under DATA_DIR); "" turns the cache off.
+LABEL_CACHE_ENV = "PDFCRUSH_CACHE_DIR"
+LABEL_CACHE_DEFAULT = ".pdfcrush_cache"
+# Part of every cache file name: bump when the labeling logic changes so old labels are ignored
+LABEL_CACHE_VERSION = 1
+
+# Documents with at least this many pages are scanned in worker processes
+PARALLEL_MIN_PAGES = 20
+# Upper bound on those worker processes (lowered by stages.worker_init inside app.py's pool)
+MAX_PROCESSES = os.cpu_count() or 1
+# Rasterizing is far heavier than scanning, so the overlay goes parallel much sooner
+RENDER_PARALLEL_MIN_PAGES = 4
+OVERLAY_DPI = 150
+
+def pdf_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()[:16]
+
+def label_cache_path(pdf_key):
+    cache_dir = os.environ.get(LABEL_CACHE_ENV, LABEL_CACHE_DEFAULT)
+    if not cache_dir: return None
+    return os.path.join(cache_dir, f"labels-v{LABEL_CACHE_VERSION}-{pdf_key}.json")
+
+def load_label_cache(cache_path):
+    if cache_path is None: return {}
     try:
-        raw = doc.xref_object(w.xref, compressed=False)
-        if b"/TU" in raw:
-            start = raw.find(b"/TU") + 3
-            start = raw.find(b"(", start) + 1
-            end   = raw.find(b")", start)
-            tooltip = raw[start:end].decode("utf‑8", errors="ignore").strip()
-    except Exception:
-        pass
-    if tooltip: return " ".join(tooltip.split())
+        with open(cache_path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
 
+def save_label_cache(cache_path, labels):
+    if cache_path is None: return
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    # Unique temp name: several jobs may finish the same form at once
+    tmp = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(labels, fh, separators=(",", ":"))
+    os.replace(tmp, cache_path)
+
+def page_words(page):
+    """
+    Word texts plus x0/y0/x1/y1 arrays for one page, built once and shared by all its widgets.
+    Arrays are sorted by y0 so each widget only inspects the words in its own row band;
+    `order` keeps the original reading-order index for tie-breaking.
+    """
     words = page.get_text("words")
-    left_words = []
-    x0_box = w.rect.x0
-    y0_box, y1_box = w.rect.y0 - vert_pad, w.rect.y1 + vert_pad
-
-    for (x0, y0, x1, y1, text, *_rest) in words:
-        if (x1 < x0_box - 5) and (x1 > x0_box - max_dist):
-            if (y1 > y0_box) and (y0 < y1_box):
-                left_words.append((x0, text))
-
-    if left_words:
-        left_words.sort(key=lambda t: t[0])
-        label = " ".join(t[1] for t in left_words).strip(" :")
+    if not words:
+        empty = np.empty(0)
+        return [], empty, empty, empty, empty, np.empty(0, dtype=int), 0.0
+    coords = np.array([wd[:4] for wd in words], dtype=float)
+    order = np.argsort(coords[:, 1], kind="stable")
+    coords = coords[order]
+    texts = [words[i][4] for i in order]
+    max_h = float((coords[:, 3] - coords[:, 1]).max())
+    return texts, coords[:, 0], coords[:, 1], coords[:, 2], coords[:, 3], order, max_h
+
+def get_widget_label(doc, page, w, words, bbox, max_dist=200, vert_pad=2):
+    # /TU is read and decoded by PyMuPDF when the widget is loaded, so this costs
+    # no extra xref lookup; split/join both trims and collapses whitespace.
+    tooltip = " ".join((w.field_label or "").split())
+    if tooltip: return tooltip
+
+    texts, xs0, ys0, xs1, ys1, order, max_h = words
+    x0_box, y0_box, _, y1_box = bbox
+    y0_box, y1_box = y0_box - vert_pad, y1_box + vert_pad
+
+    # A word overlapping the band has y0 < y1_box and y0 > y0_box - max_h (since y1 <= y0 + max_h).
+    lo = np.searchsorted(ys0, y0_box - max_h, side="right")
+    hi = np.searchsorted(ys0, y1_box, side="left")
+    sl = slice(lo, hi)
+    mask = (xs1[sl] < x0_box - 5) & (xs1[sl] > x0_box - max_dist) & (ys1[sl] > y0_box)
+    idx = np.flatnonzero(mask) + lo
+    if idx.size:
+        idx = idx[np.lexsort((order[idx], xs0[idx]))]
+        label = " ".join(texts[i] for i in idx).strip(" :")
         if label: return " ".join(label.split())
 
     return w.field_name or ""
 
-def extract_form_fields(pdf_path: str, csv_path: str):
+def page_fields(doc, page_no, labels):
+    """
+    (heading, subheading, label, x1, y1, x2, y2, field_name, xref, on_state) for each widget
+    on one page. Labels come from `labels` (str(xref) -> label) when present; new ones are
+    added to it.
+    """
+    page = doc[page_no]
+    fields = []
+    # One text-layer parse per page, shared by every widget's label lookup
+    # (done lazily, so fully cached pages never parse text at all).
+    words = None
+    for w in page.widgets() or []:
+        rect = w.rect
+        if rect is None: continue
+
+        bbox = x1, y1, x2, y2 = rect.x0, rect.y0, rect.x1, rect.y1
+        label = labels.get(str(w.xref))
+        if label is None:
+            if words is None:
+                words = page_words(page)
+            label = get_widget_label(doc, page, w, words, bbox)
+            labels[str(w.xref)] = label
+
+        field_name = w.field_name or ""
+        parts = [p.strip() for p in field_name.split(".")]
+        heading    = parts[0] if len(parts) > 0 else ""
+        subheading = parts[1] if len(parts) > 1 else ""
+
+        # --- CRITICAL UPDATES ---
+        xref = w.xref  # The absolute unique ID of this object
+
+        # Get the "On" value (e.g., "Yes", "Choice1") for radios/checks
+        try:
+            on_state = w.on_state()
+            if isinstance(on_state, bool): on_state = str(on_state)
+        except:
+            on_state = ""
+
+        fields.append((heading, subheading, label, x1, y1, x2, y2, field_name, xref, on_state))
+    return fields
+
+def scan_pages(pdf_path, page_numbers, labels):
+    """Process-pool worker: page_fields for a run of pages, plus the labels it had to compute."""
+    local = dict(labels)
+    with fitz.open(pdf_path) as doc:
+        results = [(page_no, page_fields(doc, page_no, local)) for page_no in page_numbers]
+    return results, {k: v for k, v in local.items() if k not in labels}
+
+def extract_form_fields(pdf_path: str, csv_path: str, workers=None):
     doc = fitz.open(pdf_path)
 
-    rows, row_idx = [], 1
-    for page_no in range(len(doc)):
-        page = doc[page_no]
-        widgets = page.widgets() or []
-        for w in widgets:
-            if w.rect is None: continue
-
-            x1, y1, x2, y2 = w.rect.x0, w.rect.y0, w.rect.x1, w.rect.y1
-            label = get_widget_label(doc, page, w)
-
-            parts = [p.strip() for p in (w.field_name or "").split(".")]
-            heading    = parts[0] if len(parts) > 0 else ""
-            subheading = parts[1] if len(parts) > 1 else ""
-            
-            # --- CRITICAL UPDATES ---
-            unique_id = w.field_name or f"unknown_{row_idx}"
-            xref = w.xref  # The absolute unique ID of this object
-            
-            # Get the "On" value (e.g., "Yes", "Choice1") for radios/checks
-            try:
-                on_state = w.on_state()
-                if isinstance(on_state, bool): on_state = str(on_state)
-            except:
-                on_state = ""
-
-            rows.append(
-                [row_idx, heading, subheading, label, x1, y1, x2, y2, page_no + 1, unique_id, xref, on_state]
-            )
-            row_idx += 1
-
-    if not rows:
-        raise RuntimeError(f"No interactive form fields found.")
+    cache_path = label_cache_path(pdf_digest(pdf_path))
+    labels = load_label_cache(cache_path)
+    n_labels = len(labels)
+
+    # Big documents are split into contiguous page runs across worker processes (each opens
+    # its own copy); results come back in page order so row numbering is unchanged.
+    n_pages = len(doc)
+    workers = min(workers or MAX_PROCESSES, n_pages)
+    if workers > 1 and n_pages >= PARALLEL_MIN_PAGES:
+        size = -(-n_pages // workers)
+        runs = [range(start, min(start + size, n_pages)) for start in range(0, n_pages, size)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            scanned = []
+            for results, found in pool.map(scan_pages, [pdf_path] * len(runs), runs, [labels] * len(runs)):
+                scanned.extend(results)
+                labels.update(found)
+    else:
+        scanned = [(page_no, page_fields(doc, page_no, labels)) for page_no in range(n_pages)]
 
     header = ["row", "heading", "subheading", "form_entry_description", 
               "x1", "y1", "x2", "y2", "page", "pdf_field_name", "xref", "on_state"]
-              
+
+    # Rows are numbered in page order as they are written; only what the overlay needs is kept.
+    placements, row_idx = [], 1
     with open(csv_path, "w", newline="", encoding="utf-8") as fh:
-        csv.writer(fh).writerows([header] + rows)
+        writer = csv.writer(fh)
+        writer.writerow(header)
+        for page_no, fields in scanned:
+            for heading, subheading, label, x1, y1, x2, y2, field_name, xref, on_state in fields:
+                unique_id = field_name or f"unknown_{row_idx}"
+
+                # 0.01pt is far below what the mapper or the fill step can resolve; shorter
+                # numbers keep the CSV (and every prompt that embeds it) smaller.
+                writer.writerow(
+                    [row_idx, heading, subheading, label,
+                     round(x1, 2), round(y1, 2), round(x2, 2), round(y2, 2),
+                     page_no + 1, unique_id, xref, on_state]
+                )
+                placements.append((row_idx, x1, y1, x2, y2, page_no + 1))
+                row_idx += 1
+
+    if len(labels) != n_labels:
+        try:
+            save_label_cache(cache_path, labels)
+        except OSError:
+            pass
+
+    if not placements:
+        doc.close()
+        os.remove(csv_path)
+        raise RuntimeError(f"No interactive form fields found.")
+
+    # The open doc is handed back so the overlay step doesn't parse the file again.
+    return placements, doc
+
+def render_pages(pdf_path, page_numbers, dpi):
+    """Process-pool worker: (width, height, RGB samples) per page, sent raw to skip a PNG round-trip."""
+    with fitz.open(pdf_path) as doc:
+        out = []
+        for page_no in page_numbers:
+            pix = doc[page_no].get_pixmap(dpi=dpi, annots=True)
+            out.append((pix.width, pix.height, pix.samples))
+        return out
 
-    return rows
+def overlay_pixmaps(src_doc, page_numbers, dpi=OVERLAY_DPI, workers=None):
+    """
+    Pixmaps for the given 0-based pages, yielded in order. Enough pages are split into contiguous
+    runs across worker processes (each opens the file itself); otherwise they render here.
+    """
+    workers = min(workers or MAX_PROCESSES, len(page_numbers))
+    if workers > 1 and len(page_numbers) >= RENDER_PARALLEL_MIN_PAGES and os.path.isfile(src_doc.name):
+        size = -(-len(page_numbers) // workers)
+        runs = [page_numbers[i:i + size] for i in range(0, len(page_numbers), size)]
+        with ProcessPoolExecutor(max_workers=len(runs)) as pool:
+            for run in pool.map(render_pages, [src_doc.name] * len(runs), runs, [dpi] * len(runs)):
+                for width, height, samples in run:
+                    yield fitz.Pixmap(fitz.csRGB, width, height, samples, False)
+    else:
+        for page_no in page_numbers:
+            yield src_doc[page_no].get_pixmap(dpi=dpi, annots=True)
 
-def create_overlay_pdf(original_pdf_path: str, rows, output_pdf_path: str):
-    # (Same visualization logic as before)
-    src_doc = fitz.open(original_pdf_path)
+def create_overlay_pdf(src_doc, placements, output_pdf_path: str, workers=None):
+    # placements: (row, x1, y1, x2, y2, page) per field, as returned by extract_form_fields
     out_doc = fitz.open()
+    font = fitz.Font("helv")
+    font_size = 10
+    # IDs are all digits and text_length doesn't kern, so a width table gives the same result
+    digit_widths = {d: font.text_length(d, fontsize=font_size) for d in "0123456789"}
     rows_by_page = {}
-    for r in rows:
-        p_num = r[8] 
+    for r in placements:
+        p_num = r[5]
         if p_num not in rows_by_page: rows_by_page[p_num] = []
         rows_by_page[p_num].append(r)
 
-    for i in range(len(src_doc)):
+    n_pages = len(src_doc)
+    pixmaps = overlay_pixmaps(src_doc, [p - 1 for p in sorted(rows_by_page) if 1 <= p <= n_pages], workers=workers)
+    i = 0
+    while i < n_pages:
         page_num = i + 1
-        src_page = src_doc[i]
-        pix = src_page.get_pixmap(dpi=150, annots=True)
+        page_rows = rows_by_page.get(page_num, [])
+        if not page_rows:
+            # Nothing to stamp: copy the run of field-less pages as-is instead of rasterizing
+            end = i
+            while end + 1 < n_pages and (end + 2) not in rows_by_page:
+                end += 1
+            out_doc.insert_pdf(src_doc, from_page=i, to_page=end)
+            i = end + 1
+            continue
+        i += 1
+
+        src_page = src_doc[page_num - 1]
+        pix = next(pixmaps)
         new_page = out_doc.new_page(width=src_page.rect.width, height=src_page.rect.height)
         new_page.insert_image(src_page.rect, pixmap=pix)
-        
-        page_rows = rows_by_page.get(page_num, [])
-        for row_data in page_rows:
-            idx = row_data[0]
-            x1, y1, x2, y2 = row_data[4], row_data[5], row_data[6], row_data[7]
+
+        # All of a page's numbers go into one TextWriter -> a single content-stream write.
+        tw = fitz.TextWriter(new_page.rect)
+        for idx, x1, y1, x2, y2, _ in page_rows:
             cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
             text = str(idx)
-            font_size = 10
-            font_name = "helv"
-            text_width = fitz.get_text_length(text, fontname=font_name, fontsize=font_size)
+            text_width = sum(digit_widths[c] for c in text)
             draw_x = cx - (text_width / 2)
             draw_y = cy + (font_size * 0.3)
-            new_page.insert_text((draw_x, draw_y), text, fontname=font_name, fontsize=font_size, color=(1, 0, 0))
+            tw.append((draw_x, draw_y), text, font=font, fontsize=font_size)
+        tw.write_text(new_page, color=(1, 0, 0))
 
-    out_doc.save(output_pdf_path)
+    out_doc.subset_fonts()  # the TextWriter font is embedded; keep only the digits used
+    out_doc.save(output_pdf_path, garbage=0, deflate=True)
 
-if __name__ == "__main__":
-    if len(sys.argv) != 2:
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
         sys.exit("Usage:  python extract_form_gem4.py path/to/form.pdf")
 
-    in_pdf  = sys.argv[1]
+    in_pdf  = argv[0]
     stem, _ = os.path.splitext(in_pdf)
     csv_out = f"{stem}_map.csv"
     pdf_out = f"{stem}_final.pdf"
 
-    rows = extract_form_fields(in_pdf, csv_out)
-    create_overlay_pdf(in_pdf, rows, pdf_out)
+    placements, doc = extract_form_fields(in_pdf, csv_out)
+    try:
+        create_overlay_pdf(doc, placements, pdf_out)
+    finally:
+        doc.close()
+
+if __name__ == "__main__":
+    main()
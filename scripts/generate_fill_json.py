@@ -9,18 +9,39 @@ We do NOT return coordinates or headings to save tokens.
 from __future__ import annotations
 
 import argparse
-import csv
+import functools
+import hashlib
 import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import pandas as pd
 from dotenv import load_dotenv
 from google import genai
 from google.genai import types
 from pydantic import BaseModel, Field
 
+try:
+    from scripts.llm_cache import cache_key, cache_get, cache_put
+except ImportError:  # run directly as a script from scripts/
+    from llm_cache import cache_key, cache_get, cache_put
+
 load_dotenv()
 
+CHUNK_SIZE = 150   # fields per request; keeps each response well under output limits
+MAX_WORKERS = 6    # chunks in flight at once (each is a network-bound Gemini call)
+SINGLE_SHOT_MAX_FIELDS = 400  # --single-shot sends forms up to this size as one request
+BATCH_POLL_SECONDS = 30       # --batch: how often to check on the batch job
+BATCH_DONE_STATES = {
+    types.JobState.JOB_STATE_SUCCEEDED,
+    types.JobState.JOB_STATE_PARTIALLY_SUCCEEDED,
+    types.JobState.JOB_STATE_FAILED,
+    types.JobState.JOB_STATE_CANCELLED,
+    types.JobState.JOB_STATE_EXPIRED,
+}
+
 
 # --- Minimal Output Schema (Saves Tokens) ---
 class FillItem(BaseModel):
@@ -34,23 +55,41 @@ class FillPlan(BaseModel):
 
 
 # --- Helpers ---
+SUMMARY_COLUMNS = ["heading", "subheading", "rich_description"]
+
+
 def load_rich_map_summary(csv_path: Path) -> str:
     """Load CSV but formatting as a text block for the prompt."""
-    lines = []
-    with csv_path.open("r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            # We explicitly format the context for the AI
-            # We do NOT need to load coords here, just the semantic data
-            lines.append(
-                f"ID {r['row']}: {r.get('heading','')} | {r.get('subheading','')} | {r.get('rich_description','')}"
-            )
-    return "\n".join(lines)
+    # We do NOT need to load coords here, just the semantic data (all as text, blanks as "")
+    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False, encoding="utf-8")
+    df = df.reindex(columns=["row", *SUMMARY_COLUMNS], fill_value="")
+    # One vectorized strip per column rather than per cell; stray spaces are wasted tokens
+    cols = {c: df[c].str.strip() for c in SUMMARY_COLUMNS}
+    # We explicitly format the context for the AI
+    lines = "ID " + df["row"] + ": " + cols["heading"] + " | " + cols["subheading"] + " | " + cols["rich_description"]
+    return "\n".join(lines.tolist())
+
 
+@functools.lru_cache(maxsize=None)
+def get_client(api_key: str) -> genai.Client:
+    """One client per API key per process, so app.py jobs reuse its connections."""
+    return genai.Client(api_key=api_key)
 
-def load_pdf_part(pdf_path: Path) -> types.Part:
-    with open(pdf_path, "rb") as f:
-        return types.Part.from_bytes(data=f.read(), mime_type="application/pdf")
+
+def upload_pdf(client: genai.Client, pdf_path: Path) -> types.File:
+    """Upload the PDF once via the Files API; requests then reference it instead of carrying its bytes."""
+    return client.files.upload(
+        file=str(pdf_path),
+        config=types.UploadFileConfig(mime_type="application/pdf"),
+    )
+
+
+def file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
 
 
 def chunk_text(text_list: list[str], chunk_size: int = 100):
@@ -59,59 +98,145 @@ def chunk_text(text_list: list[str], chunk_size: int = 100):
         yield text_list[i:i + chunk_size]
 
 
+def fill_prompt(instruction: str, chunk: list[str]) -> str:
+    field_block = "\n".join(chunk)
+    return (
+        "You are a form-filling engine. \n"
+        "1. Look at the PDF (Red IDs match the IDs below).\n"
+        "2. Read the User Instruction.\n"
+        "3. Return a JSON list of **ONLY** the fields that must be filled.\n"
+        "4. If a field should be left empty, do not include it in the JSON.\n\n"
+        f"USER INSTRUCTION: \"{instruction}\"\n\n"
+        f"CANDIDATE FIELDS:\n{field_block}"
+    )
+
+
+FILL_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    response_schema=FillPlan,
+    temperature=0.0,
+)
+
+
+def fill_chunk(client: genai.Client, model: str, instruction: str,
+               pdf_file: types.File, index: int, chunk: list[str]) -> list[FillItem] | None:
+    """One generate_content call for a chunk of candidate fields. None if the call failed."""
+    print(f"Processing chunk {index + 1}...")
+    try:
+        response = client.models.generate_content(
+            model=model,
+            contents=[pdf_file, fill_prompt(instruction, chunk)],
+            config=FILL_CONFIG,
+        )
+        if response.parsed:
+            return response.parsed.items
+    except Exception as e:
+        print(f"Error in chunk {index}: {e}")
+    return None
+
+
+def fill_chunks_batch(client: genai.Client, model: str, instruction: str,
+                      pdf_file: types.File, chunks: list[list[str]]) -> list[list[FillItem] | None]:
+    """
+    All chunks as one Gemini Batch API job (half the price of live calls, but it may take
+    a while to be picked up). Items come back per chunk, in chunk order; None for a failed chunk.
+    """
+    pdf_ref = types.Part.from_uri(file_uri=pdf_file.uri, mime_type=pdf_file.mime_type)
+    requests = [
+        types.InlinedRequest(
+            contents=[types.Content(role="user", parts=[pdf_ref, types.Part.from_text(text=fill_prompt(instruction, chunk))])],
+            config=FILL_CONFIG,
+        )
+        for chunk in chunks
+    ]
+    job = client.batches.create(model=model, src=requests)
+    print(f"Submitted batch {job.name} with {len(chunks)} chunk(s); polling every {BATCH_POLL_SECONDS}s...")
+
+    while job.state not in BATCH_DONE_STATES:
+        time.sleep(BATCH_POLL_SECONDS)
+        job = client.batches.get(name=job.name)
+    responses = job.dest.inlined_responses if job.dest else None
+    if not responses:
+        raise RuntimeError(f"Batch {job.name} ended with state {job.state}: {job.error}")
+
+    results = []
+    for i, inlined in enumerate(responses):
+        try:
+            if inlined.error:
+                raise RuntimeError(inlined.error)
+            results.append(FillPlan.model_validate_json(inlined.response.text).items)
+        except Exception as e:
+            print(f"Error in chunk {i}: {e}")
+            results.append(None)
+    return results
+
+
 # --- Main Logic ---
-def main() -> None:
+def main(argv: list[str] | None = None) -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("--csv", required=True, type=Path)
     parser.add_argument("--pdf", required=True, type=Path)
     parser.add_argument("--instruction", required=True)
     parser.add_argument("--out", required=True, type=Path)
     parser.add_argument("--model", default="gemini-3-pro-preview")
-    args = parser.parse_args()
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help="Chunks sent to Gemini concurrently.")
+    parser.add_argument("--single-shot", action="store_true",
+                        help=f"Send all fields in one request (forms up to {SINGLE_SHOT_MAX_FIELDS} fields; "
+                             "larger forms are still chunked).")
+    parser.add_argument("--batch", action="store_true",
+                        help="Submit the chunks as one Gemini Batch API job (cheaper, not interactive).")
+    args = parser.parse_args(argv)
 
-    client = genai.Client(api_key=os.environ["GEMINI_API_KEY"])
+    client = get_client(os.environ["GEMINI_API_KEY"])
 
     # 1. Load context
     print("Loading map and PDF...")
     full_map_text = load_rich_map_summary(args.csv).split("\n")
-    pdf_part = load_pdf_part(args.pdf)
 
     # 2. Iterate in chunks (to keep input context manageable)
-    # Gemini 3 has huge context, but chunking ensures we don't hit output limits
-    all_items = []
-
-    # Process 150 fields at a time
-    for i, chunk in enumerate(chunk_text(full_map_text, 150)):
-        print(f"Processing chunk {i + 1}...")
-        field_block = "\n".join(chunk)
-
-        prompt = (
-            "You are a form-filling engine. \n"
-            "1. Look at the PDF (Red IDs match the IDs below).\n"
-            "2. Read the User Instruction.\n"
-            "3. Return a JSON list of **ONLY** the fields that must be filled.\n"
-            "4. If a field should be left empty, do not include it in the JSON.\n\n"
-            f"USER INSTRUCTION: \"{args.instruction}\"\n\n"
-            f"CANDIDATE FIELDS:\n{field_block}"
-        )
-
+    # Gemini 3 has huge context, but chunking ensures we don't hit output limits.
+    chunk_size = CHUNK_SIZE
+    if args.single_shot and len(full_map_text) <= SINGLE_SHOT_MAX_FIELDS:
+        # One round trip for the whole plan; the PDF and instructions are only processed once
+        chunk_size = max(1, len(full_map_text))
+    chunks = list(chunk_text(full_map_text, chunk_size))
+
+    # Chunks already answered for this exact PDF, model and prompt are reused from disk
+    pdf_hash = file_digest(args.pdf)
+    keys = [cache_key(args.model, pdf_hash, fill_prompt(args.instruction, chunk)) for chunk in chunks]
+    chunk_items: list[list | None] = [cache_get(key) for key in keys]
+    pending = [i for i, items in enumerate(chunk_items) if items is None]
+    if len(pending) < len(chunks):
+        print(f"Reusing {len(chunks) - len(pending)} cached chunk(s)")
+
+    if pending:
+        pdf_file = upload_pdf(client, args.pdf)
+        # Chunks are independent, so they run concurrently; map() keeps results in chunk order.
+        # Every chunk references the same uploaded file; the client is thread-safe, so both are shared.
         try:
-            response = client.models.generate_content(
-                model=args.model,
-                contents=[pdf_part, prompt],
-                config=types.GenerateContentConfig(
-                    response_mime_type="application/json",
-                    response_schema=FillPlan,
-                    temperature=0.0,
-                ),
-            )
-            if response.parsed:
-                all_items.extend(response.parsed.items)
-        except Exception as e:
-            print(f"Error in chunk {i}: {e}")
+            if args.batch:
+                results = fill_chunks_batch(client, args.model, args.instruction, pdf_file, [chunks[i] for i in pending])
+            else:
+                with ThreadPoolExecutor(max_workers=max(1, min(args.workers, len(pending)))) as pool:
+                    results = list(pool.map(
+                        lambda i: fill_chunk(client, args.model, args.instruction, pdf_file, i, chunks[i]),
+                        pending,
+                    ))
+        finally:
+            # Uploads expire on their own after 48h, but there's no reason to keep this one
+            try:
+                client.files.delete(name=pdf_file.name)
+            except Exception as e:
+                print(f"Could not delete uploaded PDF {pdf_file.name}: {e}")
+
+        for i, items in zip(pending, results):
+            if items is not None:
+                chunk_items[i] = [item.model_dump() for item in items]
+                cache_put(keys[i], chunk_items[i])
 
     # 3. Save Minimal JSON
-    output_data = [item.model_dump() for item in all_items]
+    output_data = [item for items in chunk_items if items for item in items]
 
     with open(args.out, "w") as f:
         json.dump(output_data, f, indent=2)
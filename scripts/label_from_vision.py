@@ -10,10 +10,11 @@ Output:
 """
 
 from pathlib import Path
-import os, sys, json
+from concurrent.futures import ThreadPoolExecutor
+import os, re, sys, csv, functools, hashlib
 import fitz  # PyMuPDF
-import pandas as pd
 from dotenv import load_dotenv
+from pydantic import BaseModel
 
 # Load environment variables (Ensure GEMINI_API_KEY is in .env)
 load_dotenv()
@@ -23,31 +24,63 @@ load_dotenv()
 from google import genai
 from google.genai import types
 
+try:
+    from scripts.llm_cache import cache_key, cache_get, cache_put
+except ImportError:  # run directly as a script from scripts/
+    from llm_cache import cache_key, cache_get, cache_put
+
 # ------------------- CONFIG -------------------------------------------
 # Using the specific Gemini 3 Pro Preview model code you provided.
 MODEL_ID    = "gemini-3-pro-preview" 
-DPI         = 200       # Balance clarity and memory use for vision inference
+DPI         = 150       # Matches the overlay's 150 DPI page raster; stamped IDs are vector text
 BATCH_SIZE  = 100        # Smaller batch size to allow deep reasoning per item
+MAX_WORKERS = 6         # Batches sent to Gemini concurrently (network-bound)
+# Rows whose preliminary description is longer than this and matches the regex keep it as-is
+# and never reach the model. Default: three or more words, not a generic "Text 12"/"Check Box3"
+# style name. "" sends every row.
+CONFIDENT_MIN_CHARS = 20
+CONFIDENT_REGEX = os.environ.get(
+    "CONFIDENT_REGEX",
+    r"^(?!(?:text|check ?box|radio|button|field|untitled|unlabeled|unknown)(?:\b|\d))(?:[A-Za-z][\w'/-]*\W+){2,}[A-Za-z]",
+)
 # ----------------------------------------------------------------------
 
+# --- Output Schema ---
+class RowDescription(BaseModel):
+    id: str
+    description: str
+
+class BatchLabels(BaseModel):
+    rows: list[RowDescription]
+
+@functools.lru_cache(maxsize=None)
+def get_client(api_key: str) -> genai.Client:
+    """
+    One client per API key per process. When run in-process by app.py this
+    keeps the HTTP connection pool warm across jobs instead of re-handshaking.
+    """
+    return genai.Client(api_key=api_key)
+
+def render_page_pngs(pdf_path, page_numbers, dpi=DPI):
+    """PNG bytes for the given 1-based pages. Lossless, so the thin red ID digits stay crisp."""
+    with fitz.open(pdf_path) as doc:
+        return [doc[n - 1].get_pixmap(dpi=dpi, alpha=False).tobytes("png") for n in page_numbers]
+
 def pdf_pages_to_image_parts(pdf_path: Path, pages: list[int], dpi=DPI):
     """
-    Convert selected PDF pages to PNG bytes.
-    We render only the pages needed for the current batch to reduce memory.
+    Convert selected PDF pages to PNG image parts, keyed by 1-based page number.
+    Only pages that actually have fields are rendered, each exactly once.
+    Rendering stays in-process: a spawned worker re-imports google-genai (~0.7s), far more
+    than a typical form's pages take to render.
     """
-    doc = fitz.open(pdf_path)
-    parts = []
-    
-    page_numbers = sorted({p for p in pages if 1 <= p <= len(doc)})
+    with fitz.open(pdf_path) as doc:
+        page_count = len(doc)
+    page_numbers = sorted({p for p in pages if 1 <= p <= page_count})
     print(f"   Converting {len(page_numbers)} pages to images ({dpi} DPI) for Gemini 3 Vision...")
-    for page_number in page_numbers:
-        page = doc[page_number - 1]
-        pix = page.get_pixmap(dpi=dpi, alpha=False)
-        png_bytes = pix.tobytes("png")
-        parts.append(types.Part.from_bytes(data=png_bytes, mime_type="image/png"))
-        
-    doc.close()
-    return parts
+
+    pngs = render_page_pngs(pdf_path, page_numbers, dpi)
+
+    return {n: types.Part.from_bytes(data=png, mime_type="image/png") for n, png in zip(page_numbers, pngs)}
 
 def build_prompt_text(batch_rows, history_examples):
     """
@@ -92,17 +125,20 @@ def build_prompt_text(batch_rows, history_examples):
         "   (like 'Section 2 > Buyer Info'), include that nuance.\n"
         "4. OUTPUT: Generate a `rich_description` that clearly explains what data goes in that field.\n\n"
         "--- OUTPUT FORMAT ---\n"
-        "Return a JSON object where keys are the IDs and values are the rich descriptions."
+        "Return a JSON object with a `rows` list containing one {\"id\", \"description\"} entry per ID, "
+        "where `description` is the rich description."
     )
 
     return history_text + batch_text + instructions
 
-def call_gemini_vision(client, pdf_path, batch_rows, history_examples):
+def call_gemini_vision(client, page_parts, page_digests, batch_rows, history_examples):
     """
     Sends images + prompt to Gemini 3 Pro.
+    The system instruction and page images lead and are byte-identical for batches on the
+    same pages (Gemini's implicit caching matches on prefix); batch-specific text comes last.
     """
-    pages = [int(r.get("page") or 1) for r in batch_rows]
-    image_parts = pdf_pages_to_image_parts(pdf_path, pages)
+    pages = sorted({int(r.get("page") or 1) for r in batch_rows})
+    image_parts = [page_parts[p] for p in pages if p in page_parts]
     text_prompt = build_prompt_text(batch_rows, history_examples)
     contents = image_parts + [text_prompt]
 
@@ -113,6 +149,12 @@ def call_gemini_vision(client, pdf_path, batch_rows, history_examples):
         "even when layouts are complex, tabular, or non-standard."
     )
 
+    # Same model, prompt and page images as an earlier run -> reuse its answer
+    key = cache_key(MODEL_ID, sys_instruction, text_prompt, *(page_digests[p] for p in pages if p in page_digests))
+    cached = cache_get(key)
+    if cached is not None:
+        return cached
+
     try:
         response = client.models.generate_content(
             model=MODEL_ID,
@@ -120,81 +162,122 @@ def call_gemini_vision(client, pdf_path, batch_rows, history_examples):
             config=types.GenerateContentConfig(
                 system_instruction=sys_instruction,
                 response_mime_type="application/json", # Native JSON output
+                response_schema=BatchLabels,           # Constrained decoding: no shape guessing
                 temperature=0.1, # Low temperature for factual precision
             )
         )
-        
-        # Parse JSON result
-        result_json = json.loads(response.text)
-        if isinstance(result_json, dict):
-            return result_json
-        if isinstance(result_json, list):
-            merged = {}
-            for item in result_json:
-                if isinstance(item, dict):
-                    merged.update({str(k): v for k, v in item.items()})
-            return merged
-        return {}
+
+        labels = response.parsed or BatchLabels.model_validate_json(response.text)
+        # Only IDs from this batch; anything else the model invents is dropped
+        allowed = {str(r["row"]) for r in batch_rows}
+        merged = {r.id: r.description for r in labels.rows if r.id in allowed}
+        if merged:
+            cache_put(key, merged)
+        return merged
 
     except Exception as e:
         print(f"Error calling {MODEL_ID}: {e}")
         return {}
 
+def label_batch(client, page_parts, page_digests, index, batch_rows, history_examples):
+    """Rich descriptions for one batch, keyed by row id, with fallbacks for skipped IDs."""
+    batch_ids = [str(r["row"]) for r in batch_rows]
+    print(f"Batch {index+1}: Reasoning on IDs {batch_ids[0]} to {batch_ids[-1]}...")
+
+    batch_results = call_gemini_vision(client, page_parts, page_digests, batch_rows, history_examples)
+
+    descriptions = {}
+    for r in batch_rows:
+        rid = str(r["row"])
+        new_desc = batch_results.get(rid)
+
+        if not new_desc:
+            # Fallback if the model skipped an ID
+            existing = str(r.get("form_entry_description", "") or "").strip()
+            new_desc = existing if existing else "[Description Unavailable]"
+
+        descriptions[rid] = new_desc
+    return descriptions
+
+def split_confident(records):
+    """(descriptions kept as-is keyed by row id, rows that still need the model)."""
+    pattern = re.compile(CONFIDENT_REGEX, re.IGNORECASE) if CONFIDENT_REGEX else None
+    kept, ask = {}, []
+    for r in records:
+        prelim = str(r.get("form_entry_description", "") or "").strip()
+        if pattern and len(prelim) > CONFIDENT_MIN_CHARS and pattern.search(prelim):
+            kept[str(r["row"])] = prelim
+        else:
+            ask.append(r)
+    return kept, ask
+
 def chunk_list(lst, size):
     for i in range(0, len(lst), size):
         yield lst[i:i+size]
 
-def main():
-    if len(sys.argv) != 3:
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
         sys.exit("Usage: python label_from_vision.py <path_to_final_pdf> <path_to_map_csv>")
 
-    pdf_path = Path(sys.argv[1])
-    csv_path = Path(sys.argv[2])
+    pdf_path = Path(argv[0])
+    csv_path = Path(argv[1])
 
     if not os.environ.get("GEMINI_API_KEY"):
         sys.exit("Error: GEMINI_API_KEY not found in environment variables.")
 
     # Initialize Client
-    client = genai.Client(api_key=os.environ["GEMINI_API_KEY"])
+    client = get_client(os.environ["GEMINI_API_KEY"])
     print(f"Initialized Google GenAI Client with model: {MODEL_ID}")
 
     # 1. Load CSV (Data Context)
     print(f"Loading CSV data from {csv_path}...")
-    df = pd.read_csv(csv_path)
-    
+    with open(csv_path, newline="", encoding="utf-8") as fh:
+        reader = csv.DictReader(fh)
+        records = list(reader)
+        fieldnames = list(reader.fieldnames or [])
+
     # Ensure columns exist
     for col in ["row", "heading", "subheading", "form_entry_description", "page"]:
-        if col not in df.columns: df[col] = ""
+        if col not in fieldnames: fieldnames.append(col)
+    # Already-unambiguous labels skip the model entirely
+    descr_map, ask_list = split_confident(records)
+    print(f"Found {len(records)} fields ({len(descr_map)} already labeled). "
+          f"Processing {len(ask_list)} in batches of {BATCH_SIZE}...")
 
-    records = df.to_dict(orient="records")
-    print(f"Found {len(records)} fields. Processing in batches of {BATCH_SIZE}...")
+    # 2. Render every page that still has fields to label once, shared by all batches
+    page_parts = pdf_pages_to_image_parts(pdf_path, [int(r.get("page") or 1) for r in ask_list])
+    # Hashed once here so every batch's cache key is cheap
+    page_digests = {n: hashlib.sha256(part.inline_data.data).hexdigest() for n, part in page_parts.items()}
 
     # 3. Process Batches
-    descr_map = {}
-    history_examples = [] 
+    # The first batch runs alone and its answers become the style reference for the rest,
+    # which then run concurrently (they can't see each other's output, so no rolling history).
+    batches = list(chunk_list(ask_list, BATCH_SIZE))
+    history_examples = []
+    if batches:
+        first = label_batch(client, page_parts, page_digests, 0, batches[0], [])
+        descr_map.update(first)
+        history_examples = [{"row_id": rid, "description": d} for rid, d in first.items()]
 
-    for i, batch_rows in enumerate(chunk_list(records, BATCH_SIZE)):
-        batch_ids = [str(r["row"]) for r in batch_rows]
-        print(f"Batch {i+1}: Reasoning on IDs {batch_ids[0]} to {batch_ids[-1]}...")
-
-        batch_results = call_gemini_vision(client, pdf_path, batch_rows, history_examples)
-        
-        for r in batch_rows:
-            rid = str(r["row"])
-            new_desc = batch_results.get(rid)
-            
-            if not new_desc:
-                # Fallback if the model skipped an ID
-                existing = str(r.get("form_entry_description", "") or "").strip()
-                new_desc = existing if existing else "[Description Unavailable]"
-            
-            descr_map[rid] = new_desc
-            history_examples.append({"row_id": rid, "description": new_desc})
+    rest = batches[1:]
+    if rest:
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(rest))) as pool:
+            results = pool.map(
+                lambda job: label_batch(client, page_parts, page_digests, job[0] + 1, job[1], history_examples),
+                enumerate(rest),
+            )
+            for descriptions in results:
+                descr_map.update(descriptions)
 
     # 4. Save Results
-    df["rich_description"] = df["row"].astype(str).map(descr_map).fillna("")
     out_path = csv_path.parent / (csv_path.stem + "_rich.csv")
-    df.to_csv(out_path, index=False)
+    with open(out_path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=fieldnames + ["rich_description"], restval="")
+        writer.writeheader()
+        for r in records:
+            r["rich_description"] = descr_map.get(str(r.get("row", "")), "")
+            writer.writerow(r)
     
     print("-" * 60)
     print(f"✓ Success! Gemini 3 Pro analysis saved to:")
@@ -0,0 +1,56 @@
+"""
+llm_cache.py
+------------------------------------
+On-disk cache of finished Gemini answers, one JSON file per request hash, shared by
+label_from_vision and generate_fill_json.
+
+The directory is read from LLM_CACHE_DIR on every call (app.py points it under DATA_DIR);
+an empty value turns the cache off.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+LLM_CACHE_ENV = "LLM_CACHE_DIR"
+LLM_CACHE_DEFAULT = ".llm_cache"
+
+
+def cache_dir() -> str:
+    return os.environ.get(LLM_CACHE_ENV, LLM_CACHE_DEFAULT)
+
+
+def cache_key(*parts: str) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def cache_get(key: str):
+    root = cache_dir()
+    if not root:
+        return None
+    try:
+        with open(Path(root) / f"{key}.json", "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def cache_put(key: str, value) -> None:
+    root = cache_dir()
+    if not root:
+        return
+    path = Path(root) / f"{key}.json"
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(value, fh)
+        os.replace(tmp, path)
+    except OSError:
+        pass
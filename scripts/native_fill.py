@@ -10,8 +10,11 @@ Changes from v18:
 
 import argparse
 import json
-import csv
 import fitz
+import pandas as pd
+
+MAP_INT_COLUMNS = ["row", "page", "xref"]
+MAP_RECT_COLUMNS = ["x1", "y1", "x2", "y2"]
 
 def get_parent_field_type(doc, widget):
     try:
@@ -54,88 +57,92 @@ def is_button_field(doc, widget):
     parent_ft = get_parent_field_type(doc, widget)
     return parent_ft == "/Btn"
 
-def main():
+def load_field_map(csv_path):
+    """row id -> page/xref/rect for every CSV row whose ids and coordinates are all numeric."""
+    cols = MAP_INT_COLUMNS + MAP_RECT_COLUMNS
+    df = pd.read_csv(csv_path, usecols=lambda c: c in cols, dtype=str, encoding="utf-8")
+    df = df.reindex(columns=cols).apply(pd.to_numeric, errors="coerce").dropna()
+    rows, pages, xrefs = (df[c].astype("int64").tolist() for c in MAP_INT_COLUMNS)
+    rects = df[MAP_RECT_COLUMNS].itertuples(index=False, name=None)
+    return {
+        row_id: {"page": page, "xref": xref, "rect": fitz.Rect(rect)}
+        for row_id, page, xref, rect in zip(rows, pages, xrefs, rects)
+    }
+
+def main(argv=None):
     parser = argparse.ArgumentParser()
     parser.add_argument("--pdf", required=True)
     parser.add_argument("--csv", required=True)
     parser.add_argument("--plan", required=True)
     parser.add_argument("--out-active", required=True)
     parser.add_argument("--out-flat", required=True)
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # Load Map
-    csv_map = {}
-    with open(args.csv, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            try:
-                row_id = int(r['row'])
-                csv_map[row_id] = {
-                    "page": int(r['page']),
-                    "xref": int(r['xref']),
-                    "rect": fitz.Rect(float(r['x1']), float(r['y1']), float(r['x2']), float(r['y2']))
-                }
-            except: continue
+    csv_map = load_field_map(args.csv)
 
     # Load Plan
     with open(args.plan, "r") as f:
         fill_data = json.load(f)
 
+    # Plan items grouped by page (plan order kept within a page), so each page and
+    # its widget list are loaded once rather than once per item
+    by_page = {}
+    for item in fill_data:
+        target = csv_map.get(item['row'])
+        if not target: continue
+        by_page.setdefault(target['page'] - 1, []).append((target['xref'], item['value']))
+
     # ---------------------------------------------------------
     # PART A: Generate Editable PDF
     # ---------------------------------------------------------
     doc = fitz.open(args.pdf)
 
-    for item in fill_data:
-        row_id = item['row']
-        val = item['value']
-        target = csv_map.get(row_id)
-        if not target: continue
+    for page_idx in sorted(by_page):
+        page = doc[page_idx]
+        widgets = {w.xref: w for w in page.widgets()}
 
-        page = doc[target['page'] - 1]
-        target_xref = target['xref']
+        for target_xref, val in by_page[page_idx]:
+            widget = widgets.get(target_xref)
+            if widget is None: continue
 
-        for widget in page.widgets():
-            if widget.xref == target_xref:
+            if is_button_field(doc, widget):
+                should_check = str(val).lower() in ["x", "true", "yes", "on", "1", "checked"]
                 
-                if is_button_field(doc, widget):
-                    should_check = str(val).lower() in ["x", "true", "yes", "on", "1", "checked"]
-                    
-                    if should_check:
-                        on_state = get_on_state_from_ap(doc, widget)
-                        if not on_state:
-                            try:
-                                os = widget.on_state()
-                                if os and os is not True:
-                                    on_state = str(os)
-                            except:
-                                pass
-                        if not on_state:
-                            on_state = "Yes"
-                        
-                        print(f"  Radio: xref {widget.xref} -> /{on_state}")
-                        
-                        # ONLY set AS - minimal change
-                        doc.xref_set_key(widget.xref, "AS", f"/{on_state}")
-                        
-                        # Set parent V for radio groups
+                if should_check:
+                    on_state = get_on_state_from_ap(doc, widget)
+                    if not on_state:
                         try:
-                            parent_info = doc.xref_get_key(widget.xref, "Parent")
-                            if parent_info[0] == "xref":
-                                parent_xref = int(parent_info[1].split()[0])
-                                doc.xref_set_key(parent_xref, "V", f"/{on_state}")
+                            os = widget.on_state()
+                            if os and os is not True:
+                                on_state = str(os)
                         except:
                             pass
-                    else:
-                        doc.xref_set_key(widget.xref, "AS", "/Off")
-
+                    if not on_state:
+                        on_state = "Yes"
+                    
+                    print(f"  Radio: xref {widget.xref} -> /{on_state}")
+                    
+                    # ONLY set AS - minimal change
+                    doc.xref_set_key(widget.xref, "AS", f"/{on_state}")
+                    
+                    # Set parent V for radio groups
+                    try:
+                        parent_info = doc.xref_get_key(widget.xref, "Parent")
+                        if parent_info[0] == "xref":
+                            parent_xref = int(parent_info[1].split()[0])
+                            doc.xref_set_key(parent_xref, "V", f"/{on_state}")
+                    except:
+                        pass
                 else:
-                    widget.text_font = "Helv"
-                    widget.text_fontsize = 0
-                    widget.text_color = [0, 0, 0]
-                    widget.field_value = str(val)
-                    widget.update()
-                break
+                    doc.xref_set_key(widget.xref, "AS", "/Off")
+
+            else:
+                widget.text_font = "Helv"
+                widget.text_fontsize = 0
+                widget.text_color = [0, 0, 0]
+                widget.field_value = str(val)
+                widget.update()
 
     # Save with minimal changes - garbage=0 preserves all objects
     doc.save(args.out_active, garbage=0, deflate=True)
@@ -149,36 +156,43 @@ def main():
     print("   Applying Visual Overrides...")
     blue_color = (0.2, 0.2, 0.4) 
 
-    for item in fill_data:
-        row_id = item['row']
-        val = item['value']
-        target = csv_map.get(row_id)
-        if not target: continue
+    for page_idx in sorted(by_page):
+        page = doc_visual[page_idx]
+        widgets = None
+        # Every mark on the page goes into one Shape -> a single content-stream write
+        shape = None
+
+        for target_xref, val in by_page[page_idx]:
+            is_check = str(val).lower() in ["x", "true", "yes", "on", "1", "checked"]
+            if not is_check: continue
+
+            if widgets is None:
+                widgets = {w.xref: w for w in page.widgets()}
+            target_widget = widgets.get(target_xref)
 
-        page = doc_visual[target['page'] - 1]
-        is_check = str(val).lower() in ["x", "true", "yes", "on", "1", "checked"]
-        
-        if is_check:
-            target_widget = None
-            for w in page.widgets():
-                if w.xref == target['xref']:
-                    target_widget = w
-                    break
-            
             if target_widget and is_button_field(doc_visual, target_widget):
+                del widgets[target_xref]
                 rect = target_widget.rect
                 is_radio_style = target_widget.field_name and "Group" in target_widget.field_name
                 
                 page.delete_widget(target_widget)
-                
+                if shape is None:
+                    shape = page.new_shape()
+
                 if is_radio_style:
                     center = fitz.Point((rect.x0 + rect.x1)/2, (rect.y0 + rect.y1)/2)
                     radius = min(rect.width, rect.height) / 4 
-                    page.draw_circle(center, radius, color=blue_color, fill=blue_color)
+                    shape.draw_circle(center, radius)
+                    shape.finish(color=blue_color, fill=blue_color)
                 else:
                     p = 2
-                    page.draw_line(fitz.Point(rect.x0+p, rect.y0+p), fitz.Point(rect.x1-p, rect.y1-p), color=blue_color, width=1.5)
-                    page.draw_line(fitz.Point(rect.x0+p, rect.y1-p), fitz.Point(rect.x1-p, rect.y0+p), color=blue_color, width=1.5)
+                    for start, end in (((rect.x0+p, rect.y0+p), (rect.x1-p, rect.y1-p)),
+                                       ((rect.x0+p, rect.y1-p), (rect.x1-p, rect.y0+p))):
+                        shape.draw_line(fitz.Point(start), fitz.Point(end))
+                        shape.finish(color=blue_color, width=1.5, closePath=False)
+
+        if shape is not None:
+            shape.commit()
 
     print("   Rasterizing...")
     doc_flat = fitz.open()
@@ -0,0 +1,80 @@
+"""
+stages.py
+------------------------------------
+Runs the pipeline scripts in-process for app.py.
+
+Stages are looked up by name so they can be submitted to a process pool
+(modules themselves cannot be pickled). Each stage's stdout/stderr is
+captured per thread and returned to the caller.
+"""
+
+import importlib
+import io
+import sys
+import threading
+import traceback
+
+STAGES = {
+    "extract_form_gem4": "scripts.extract_form_fields",
+    "label_from_vision": "scripts.label_from_vision",
+    "generate_fill_json": "scripts.generate_fill_json",
+    "native_fill": "scripts.native_fill",
+}
+
+# PDF parsing / rasterising stages; the rest are network-bound Gemini calls.
+CPU_STAGES = ("extract_form_gem4", "native_fill")
+
+_stage_output = threading.local()
+
+
+class _StageStream(io.TextIOBase):
+    """Routes stdout/stderr writes to the capture buffer of the calling stage thread."""
+
+    def __init__(self, fallback):
+        self._fallback = fallback
+
+    def write(self, s):
+        buf = getattr(_stage_output, "buf", None)
+        return (self._fallback if buf is None else buf).write(s)
+
+    def flush(self):
+        self._fallback.flush()
+
+    def isatty(self):
+        return self._fallback.isatty()
+
+    def fileno(self):
+        return self._fallback.fileno()
+
+
+if not isinstance(sys.stdout, _StageStream):
+    sys.stdout = _StageStream(sys.stdout)
+    sys.stderr = _StageStream(sys.stderr)
+
+
+def worker_init(max_processes=1):
+    """
+    Process-pool initializer: pay the fitz import once per worker, not per job.
+    Stages that fan out to their own worker processes are capped at max_processes.
+    """
+    for name in CPU_STAGES:
+        module = importlib.import_module(STAGES[name])
+        if hasattr(module, "MAX_PROCESSES"):
+            module.MAX_PROCESSES = max_processes
+
+
+def run_stage(name: str, argv: list[str]) -> str:
+    """Run the stage's ``main(argv)`` on the calling thread and return its captured output."""
+    module = importlib.import_module(STAGES[name])
+    buf = io.StringIO()
+    _stage_output.buf = buf
+    try:
+        module.main(argv)
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            raise RuntimeError(f"{name} failed:\n{e.code}\n{buf.getvalue()}")
+    except Exception:
+        raise RuntimeError(f"{name} failed:\n{traceback.format_exc()}\n{buf.getvalue()}")
+    finally:
+        _stage_output.buf = None
+    return buf.getvalue()